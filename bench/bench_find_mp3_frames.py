@@ -0,0 +1,123 @@
+"""
+Benchmark find_mp3_frames against the previous two-pass scanner
+
+Usage:
+    python bench/bench_find_mp3_frames.py [--sizes 16 64] [--repeat 3]
+
+Runs on test/original.mp3 and on synthetic covers made by repeating its
+frames (with a little junk between repeats) up to the given sizes in MB.
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+from typing import Tuple
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "src"))
+
+from stego.frames import _parse_frame_header, find_id3v2_end, find_mp3_frames  # noqa: E402
+
+
+def legacy_find_mp3_frames(
+    data: bytes, start_offset: int = 0, min_consec: int = 3, max_scan: int | None = None
+) -> list[Tuple[int, int]]:
+    """The scanner before the single-pass rewrite, kept for comparison"""
+    pos = start_offset
+    n = len(data)
+    frames = []
+    limit = n if max_scan is None else min(n, start_offset + max_scan)
+
+    while pos + 4 <= limit:
+        valid, info = _parse_frame_header(data[pos : pos + 4])
+        if not valid:
+            pos += 1
+            continue
+
+        frame_len = info["frame_length"]
+        if frame_len <= 4 or pos + frame_len > n:
+            pos += 1
+            continue
+
+        next_pos = pos + frame_len
+        valid2, _ = (False, {})
+        if next_pos + 4 <= limit:
+            valid2, _ = _parse_frame_header(data[next_pos : next_pos + 4])
+
+        if not valid2:
+            frames.append((pos, frame_len))
+            pos += frame_len
+            continue
+        else:
+            run_start = pos
+            count = 1
+            cur = next_pos
+            while cur + 4 <= limit:
+                v, inf = _parse_frame_header(data[cur : cur + 4])
+                if not v:
+                    break
+                fl = inf["frame_length"]
+                if fl <= 4 or cur + fl > n:
+                    break
+                count += 1
+                cur += fl
+            if count >= min_consec:
+                cur2 = run_start
+                for _ in range(count):
+                    _, info_run = _parse_frame_header(data[cur2 : cur2 + 4])
+                    frames.append((cur2, info_run["frame_length"]))
+                    cur2 += info_run["frame_length"]
+                pos = cur2
+            else:
+                frames.append((pos, frame_len))
+                pos += frame_len
+
+    return frames
+
+
+def synthetic_cover(audio: bytes, size: int) -> bytes:
+    """Repeat the audio frames up to size bytes, separated by non-frame junk"""
+    junk = bytes(range(0, 250, 3)) * 4
+    out = bytearray()
+    while len(out) < size:
+        out += audio
+        out += junk
+    return bytes(out[:size])
+
+
+def timed(func, data: bytes, start: int, repeat: int) -> Tuple[float, list]:
+    best = float("inf")
+    result: list = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = func(data, start_offset=start, min_consec=3)
+        best = min(best, time.perf_counter() - t0)
+    return best, result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="*", default=[16, 64])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    fixture = (ROOT / "test" / "original.mp3").read_bytes()
+    id3_end = find_id3v2_end(fixture)
+
+    cases = [("test/original.mp3", fixture, id3_end)]
+    for size_mb in args.sizes:
+        data = synthetic_cover(fixture[id3_end:], size_mb * 1024 * 1024)
+        cases.append((f"synthetic {size_mb} MB", data, 0))
+
+    print(f"{'input':<22}{'frames':>10}{'legacy (s)':>14}{'new (s)':>12}{'speedup':>10}")
+    for name, data, start in cases:
+        t_old, old = timed(legacy_find_mp3_frames, data, start, args.repeat)
+        t_new, new = timed(find_mp3_frames, data, start, args.repeat)
+        if old != new:
+            raise SystemExit(f"Frame tables differ for {name}")
+        print(f"{name:<22}{len(new):>10}{t_old:>14.3f}{t_new:>12.3f}{t_old / t_new:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
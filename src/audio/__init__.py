@@ -1 +1 @@
-from .player import audio_player
+from .player import AudioPlayer, close_audio_player, get_audio_player
\ No newline at end of file
@@ -23,10 +23,17 @@ class AudioPlayer:
         self._pause_event = threading.Event()
         self._pause_event.set()  # Start unpaused
 
-        self.pyaudio_instance = None
+        # PyAudio probes the audio devices, so it is only created when playing starts
+        self.pyaudio_instance: Optional[pyaudio.PyAudio] = None
+        self._pyaudio_lock = threading.Lock()
         self.stream = None
 
-        self.pyaudio_instance = pyaudio.PyAudio()
+    def get_pyaudio(self) -> pyaudio.PyAudio:
+        """The PyAudio instance, created on first use"""
+        with self._pyaudio_lock:
+            if self.pyaudio_instance is None:
+                self.pyaudio_instance = pyaudio.PyAudio()
+            return self.pyaudio_instance
 
     def load_file(self, file_path: str) -> bool:
         """
@@ -168,7 +175,7 @@ class AudioPlayer:
 
             format = format_map.get(audio_data.sample_width, pyaudio.paInt16)
 
-            self.stream = self.pyaudio_instance.open(
+            self.stream = self.get_pyaudio().open(
                 format=format,
                 channels=audio_data.channels,
                 rate=audio_data.frame_rate,
@@ -231,10 +238,33 @@ class AudioPlayer:
     def cleanup(self):
         """Clean up resources"""
         self.stop()
-        if self.pyaudio_instance:
-            self.pyaudio_instance.terminate()
-            self.pyaudio_instance = None
-
-
-# Global audio player instance
-audio_player = AudioPlayer()
\ No newline at end of file
+        with self._pyaudio_lock:
+            if self.pyaudio_instance:
+                self.pyaudio_instance.terminate()
+                self.pyaudio_instance = None
+
+
+# Shared audio player, created by get_audio_player
+_audio_player: Optional[AudioPlayer] = None
+_audio_player_lock = threading.Lock()
+
+
+def get_audio_player() -> AudioPlayer:
+    """The shared audio player, created on first use"""
+    global _audio_player
+    with _audio_player_lock:
+        if _audio_player is None:
+            _audio_player = AudioPlayer()
+        return _audio_player
+
+
+def close_audio_player() -> None:
+    """
+    Stop the shared player and release PyAudio, if it was created.
+    The next get_audio_player() call starts a new one
+    """
+    global _audio_player
+    with _audio_player_lock:
+        player, _audio_player = _audio_player, None
+    if player is not None:
+        player.cleanup()
\ No newline at end of file
@@ -1,19 +1,27 @@
-from itertools import cycle
+from itertools import cycle, islice
 
 
-def vigenere_encrypt(data: bytes, key: str) -> bytes:
+def _key_stream(key: str, offset: int):
+    """Key bytes repeated, starting at data position offset"""
+    key_bytes = key.encode("utf-8")
+    if not key_bytes:
+        return iter(())
+    return islice(cycle(key_bytes), offset % len(key_bytes), None)
+
+
+def vigenere_encrypt(data: bytes, key: str, offset: int = 0) -> bytes:
     """
     Encrypt data using Vigenere cipher with the given key.
     Works on arbitrary binary data.
+    offset is the position of data in the whole message, to encrypt a slice of it.
     """
-    key_bytes = key.encode("utf-8")
-    return bytes((b + k) % 256 for b, k in zip(data, cycle(key_bytes)))
+    return bytes((b + k) % 256 for b, k in zip(data, _key_stream(key, offset)))
 
 
-def vigenere_decrypt(data: bytes, key: str) -> bytes:
+def vigenere_decrypt(data: bytes, key: str, offset: int = 0) -> bytes:
     """
     Decrypt data encrypted with Vigenere cipher.
     Works on arbitrary binary data.
+    offset is the position of data in the whole message, to decrypt a slice of it.
     """
-    key_bytes = key.encode("utf-8")
-    return bytes((b - k) % 256 for b, k in zip(data, cycle(key_bytes)))
+    return bytes((b - k) % 256 for b, k in zip(data, _key_stream(key, offset)))
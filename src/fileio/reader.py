@@ -1,11 +1,20 @@
+import mmap
 from pathlib import Path
 from typing import Tuple
-import librosa
 import numpy as np
 from utils.exceptions import IOReaderError
 from utils.types import SecretFile
 
 
+def check_mp3_signature(data: bytes, source: str = "Data") -> None:
+    """
+    Raise IOReaderError unless the data starts with an ID3v2 tag or an MPEG-1
+    Layer III frame sync. source names the data in the message
+    """
+    if not (data[0:3] == b"ID3" or data[0:2] == b"\xff\xfb"):
+        raise IOReaderError(f"{source} does not look like a valid MP3 file")
+
+
 def read_mp3_bytes(path: str | Path) -> bytearray:
     """
     Read an MP3 file into a bytearray.
@@ -19,12 +28,34 @@ def read_mp3_bytes(path: str | Path) -> bytearray:
     except Exception as e:
         raise IOReaderError(f"Failed to read MP3 file {path}") from e
 
-    if not (data.startswith(b"ID3") or data[0:2] == b"\xff\xfb"):
-        raise IOReaderError(f"File {path} does not look like a valid MP3 file")
-
+    check_mp3_signature(data, f"File {path}")
     return bytearray(data)
 
 
+def map_mp3_bytes(path: str | Path) -> mmap.mmap:
+    """
+    Map an MP3 file read-only into memory without copying it.
+    Pages are only loaded when they are read. Use as a context manager to close it.
+    """
+    file_path = Path(path)
+    if not file_path.exists():
+        raise IOReaderError(f"MP3 file not found: {path}")
+
+    try:
+        with open(file_path, "rb") as f:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except Exception as e:
+        raise IOReaderError(f"Failed to read MP3 file {path}") from e
+
+    try:
+        check_mp3_signature(data, f"File {path}")
+    except IOReaderError:
+        data.close()
+        raise
+
+    return data
+
+
 def skip_id3_tag(mp3_bytes: bytearray) -> Tuple[int, bytearray]:
     """
     Skip the ID3v2 tag if present.  
@@ -53,6 +84,9 @@ def load_mp3_as_pcm(path: str | Path) -> Tuple[np.ndarray, int]:
     if not file_path.exists():
         raise IOReaderError(f"MP3 file not found: {path}")
 
+    # librosa pulls in the DSP stack (numba, scipy), only load it when decoding
+    import librosa
+
     try:
         samples, sr = librosa.load(file_path, sr=None)
         return samples, sr
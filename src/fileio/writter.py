@@ -1,4 +1,7 @@
+import mmap
+import shutil
 from pathlib import Path
+import numpy as np
 from utils.exceptions import IOWriterError
 
 
@@ -11,3 +14,33 @@ def write_mp3_bytes(path: str | Path, data: bytearray) -> None:
         file_path.write_bytes(data)
     except Exception as e:
         raise IOWriterError(f"Failed to write MP3 file {path}") from e
+
+
+def copy_mp3_file(source: str | Path, path: str | Path) -> None:
+    """
+    Copy an MP3 file. shutil.copyfile uses the kernel copy (copy_file_range /
+    sendfile) when available and falls back to a streaming copy.
+    """
+    try:
+        shutil.copyfile(source, path)
+    except Exception as e:
+        raise IOWriterError(f"Failed to copy MP3 file {source} to {path}") from e
+
+
+def patch_mp3_bytes(path: str | Path, positions: np.ndarray, values: np.ndarray) -> None:
+    """
+    Overwrite the bytes at the given positions of an existing file, in place.
+    The file is memory mapped so only the touched pages are read and written.
+    """
+    if len(positions) == 0:
+        return
+
+    try:
+        with open(path, "r+b") as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_WRITE) as data:
+                view = np.frombuffer(data, dtype=np.uint8)
+                view[positions] = values
+                del view
+                data.flush()
+    except Exception as e:
+        raise IOWriterError(f"Failed to write MP3 file {path}") from e
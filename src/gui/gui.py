@@ -5,8 +5,8 @@ from typing import Optional
 
 import flet as ft
 
-from stego import embed, extract, compare_mp3_files
-from audio.player import audio_player
+from stego.aio import acompare, aembed, aextract
+from audio.player import close_audio_player, get_audio_player
 
 
 class GUI:
@@ -637,9 +637,10 @@ class GUI:
                 self.player_file_text.color = "green"
                 self.page.update()
 
-                if audio_player.load_file(file_path):
+                player = get_audio_player()
+                if player.load_file(file_path):
                     self.seek_slider.disabled = False
-                    self.seek_slider.max = audio_player.get_duration()
+                    self.seek_slider.max = player.get_duration()
                     self.page.update()
                 else:
                     self.player_file_text.value = (
@@ -686,11 +687,12 @@ class GUI:
 
     # Audio player
     def toggle_play(self, e):
-        if audio_player.is_file_playing():
-            audio_player.pause()
+        player = get_audio_player()
+        if player.is_file_playing():
+            player.pause()
             self.play_button.text = "Play"
         else:
-            if audio_player.play():
+            if player.play():
                 self.play_button.text = "Pause"
                 self.start_position_tracking()
             else:
@@ -698,19 +700,20 @@ class GUI:
         self.page.update()
 
     def stop_audio(self, e):
-        audio_player.stop()
+        get_audio_player().stop()
         self.play_button.text = "Play"
         self.seek_slider.value = 0
         self.page.update()
 
     def on_volume_change(self, e):
         volume = self.volume_slider.value / 100.0
-        audio_player.set_volume(volume)
+        get_audio_player().set_volume(volume)
 
     def on_seek_change(self, e):
-        if audio_player.get_duration() > 0:
-            position = (self.seek_slider.value / 100.0) * audio_player.get_duration()
-            audio_player.seek(position)
+        player = get_audio_player()
+        if player.get_duration() > 0:
+            position = (self.seek_slider.value / 100.0) * player.get_duration()
+            player.seek(position)
 
     def start_position_tracking(self):
         self.stop_position_thread = False
@@ -721,8 +724,9 @@ class GUI:
 
     def update_position_display(self):
         while not self.stop_position_thread:
-            position = audio_player.get_position()
-            duration = audio_player.get_duration()
+            player = get_audio_player()
+            position = player.get_position()
+            duration = player.get_duration()
 
             pos_str = self.format_time(position)
             dur_str = self.format_time(duration)
@@ -732,7 +736,7 @@ class GUI:
             if duration > 0:
                 self.seek_slider.value = (position / duration) * 100
 
-            if not audio_player.is_file_playing() and position > 0:
+            if not player.is_file_playing() and position > 0:
                 self.play_button.text = "Play"
 
             self.page.update()
@@ -747,121 +751,112 @@ class GUI:
         return f"{minutes:02d}:{seconds:02d}"
 
 
-    def perform_embed(self, e):
-        """Embedding"""
+    async def perform_embed(self, e):
+        """Embedding, runs on the stego executor"""
         if not self.validate_embed_inputs():
             return
 
-        def embed_worker():
-            try:
-                self.set_status("Embedding", True)
-
-                lsb_count = int(self.lsb_count_dropdown.value or "2")
-                encrypt = self.encrypt_checkbox.value
-                random_pos = self.random_position_checkbox.value
-                key = self.key_textfield.value if (encrypt or random_pos) else None
-
-                embed(
-                    audio_path=self.cover_audio_path,
-                    file_to_hide_path=self.secret_file_path,
-                    output_path=self.output_audio_path,
-                    bits_per_sample=lsb_count,
-                    encrypt=encrypt,
-                    key=key,
-                    random_position=random_pos,
-                )
-
-                self.set_status("Embedding completed", False, "green")
-                self.show_notification("Secret file embedded successfully", "green")
+        try:
+            self.set_status("Embedding", True)
+
+            lsb_count = int(self.lsb_count_dropdown.value or "2")
+            encrypt = self.encrypt_checkbox.value
+            random_pos = self.random_position_checkbox.value
+            key = self.key_textfield.value if (encrypt or random_pos) else None
+
+            await aembed(
+                audio_path=self.cover_audio_path,
+                file_to_hide_path=self.secret_file_path,
+                output_path=self.output_audio_path,
+                bits_per_sample=lsb_count,
+                encrypt=encrypt,
+                key=key,
+                random_position=random_pos,
+            )
 
-            except Exception as ex:
-                error_msg = f"Embedding failed: {str(ex)}"
-                self.set_status(error_msg, False, "red")
-                self.show_notification(f"{error_msg}", "red")
+            self.set_status("Embedding completed", False, "green")
+            self.show_notification("Secret file embedded successfully", "green")
 
-        threading.Thread(target=embed_worker, daemon=True).start()
+        except Exception as ex:
+            error_msg = f"Embedding failed: {str(ex)}"
+            self.set_status(error_msg, False, "red")
+            self.show_notification(f"{error_msg}", "red")
 
-    def perform_extract(self, e):
-        """Extraction"""
+    async def perform_extract(self, e):
+        """Extraction, runs on the stego executor"""
         if not self.validate_extract_inputs():
             return
 
-        def extract_worker():
-            try:
-                self.set_status("Extracting", True)
-
-                encrypted = self.extract_encrypt_checkbox.value
-                if encrypted is None:
-                    encrypted = False
-                random_pos = self.extract_random_checkbox.value
-                key = (
-                    self.extract_key_textfield.value
-                    if (encrypted or random_pos)
-                    else None
-                )
-
-                extracted_file = extract(
-                    stego_audio_path=self.stego_audio_path,
-                    output_path=self.extract_output_folder,
-                    encrypted=encrypted,
-                    key=key,
-                    random_position=random_pos,
-                )
+        try:
+            self.set_status("Extracting", True)
+
+            encrypted = self.extract_encrypt_checkbox.value
+            if encrypted is None:
+                encrypted = False
+            random_pos = self.extract_random_checkbox.value
+            key = (
+                self.extract_key_textfield.value
+                if (encrypted or random_pos)
+                else None
+            )
 
-                self.set_status(
-                    f"File saved: {os.path.basename(extracted_file)}",
-                    False,
-                    "green",
-                )
-                self.show_notification(
-                    f"Saved: {os.path.basename(extracted_file)}",
-                    "green",
-                )
+            extracted_file = await aextract(
+                stego_audio_path=self.stego_audio_path,
+                output_path=self.extract_output_folder,
+                encrypted=encrypted,
+                key=key,
+                random_position=random_pos,
+            )
 
-            except Exception as ex:
-                error_msg = f"Extraction failed: {str(ex)}"
-                self.set_status(error_msg, False, "red")
-                self.show_notification(f"{error_msg}", "red")
+            self.set_status(
+                f"File saved: {os.path.basename(extracted_file)}",
+                False,
+                "green",
+            )
+            self.show_notification(
+                f"Saved: {os.path.basename(extracted_file)}",
+                "green",
+            )
 
-        threading.Thread(target=extract_worker, daemon=True).start()
+        except Exception as ex:
+            error_msg = f"Extraction failed: {str(ex)}"
+            self.set_status(error_msg, False, "red")
+            self.show_notification(f"{error_msg}", "red")
 
-    def perform_compare(self, e):
-        """PSNR comparison"""
+    async def perform_compare(self, e):
+        """PSNR comparison, runs on the stego executor"""
         if not self.validate_compare_inputs():
             return
 
-        def compare_worker():
-            try:
-                self.set_status("Comparing audio files", True)
+        try:
+            self.set_status("Comparing audio files", True)
 
-                # Perform comparison
-                psnr_value = compare_mp3_files(
-                    Path(self.compare_original_path), Path(self.compare_modified_path)
-                )
+            # Perform comparison
+            psnr_value = await acompare(
+                Path(self.compare_original_path), Path(self.compare_modified_path)
+            )
 
-                # Display result
-                self.psnr_result_text.value = f"PSNR: {psnr_value:.4f} dB"
-                self.psnr_result_text.color = "blue"
+            # Display result
+            self.psnr_result_text.value = f"PSNR: {psnr_value:.4f} dB"
+            self.psnr_result_text.color = "blue"
 
-                self.set_status("Comparison completed successfully", False, "green")
+            self.set_status("Comparison completed successfully", False, "green")
 
-                if psnr_value > 30:
-                    quality = "Good quality"
-                else:
-                    quality = "Low quality"
-
-                self.show_notification(
-                    f"PSNR: {psnr_value:.2f} dB - {quality}", "blue"
-                )
+            if psnr_value > 30:
+                quality = "Good quality"
+            else:
+                quality = "Low quality"
 
-            except Exception as ex:
-                error_msg = f"Comparison failed: {str(ex)}"
-                self.set_status(error_msg, False, "red")
-                self.psnr_result_text.value = "Comparison failed"
-                self.psnr_result_text.color = "red"
-                self.show_notification(f"{error_msg}", "red")
+            self.show_notification(
+                f"PSNR: {psnr_value:.2f} dB - {quality}", "blue"
+            )
 
-        threading.Thread(target=compare_worker, daemon=True).start()
+        except Exception as ex:
+            error_msg = f"Comparison failed: {str(ex)}"
+            self.set_status(error_msg, False, "red")
+            self.psnr_result_text.value = "Comparison failed"
+            self.psnr_result_text.color = "red"
+            self.show_notification(f"{error_msg}", "red")
 
     # Validation methods
     def validate_embed_inputs(self) -> bool:
@@ -919,7 +914,7 @@ class GUI:
     def cleanup(self):
         """Clean up resources"""
         self.stop_position_thread = True
-        audio_player.cleanup()
+        close_audio_player()
 
 
 def run_gui(page: ft.Page):
@@ -1,9 +1,224 @@
 import argparse
+import contextlib
+import json
+import os
 import sys
 from pathlib import Path
-import flet as ft
-from stego import compare_mp3_files, embed, extract
-from gui import run_gui
+from fileio import reader, writter
+from stego import (
+    LEGACY_MAX_SCAN,
+    compare_mp3_files,
+    embed,
+    embed_bytes,
+    extract,
+    extract_info,
+    extract_range,
+    inspect,
+)
+from utils.exceptions import DaemonError
+from utils.options import parse_byte_range
+
+# Path argument that means stdin or stdout
+STDIO = "-"
+
+
+def is_stdio(path: Path | None) -> bool:
+    return path is not None and str(path) == STDIO
+
+
+def read_stdin() -> bytes:
+    return sys.stdin.buffer.read()
+
+
+def read_stdin_mp3() -> bytes:
+    """Read an MP3 from stdin, checked like an MP3 read from a path"""
+    data = read_stdin()
+    reader.check_mp3_signature(data, "Stdin")
+    return data
+
+
+def write_stdout(data: bytes) -> None:
+    sys.stdout.buffer.write(data)
+    sys.stdout.buffer.flush()
+
+
+def byte_range_arg(value: str) -> tuple[int, int | None]:
+    try:
+        return parse_byte_range(value)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+
+
+def legacy_max_scan(args: argparse.Namespace) -> int | None:
+    """max_scan for --legacy-layout, None reads the current layout"""
+    return LEGACY_MAX_SCAN if getattr(args, "legacy_layout", False) else None
+
+
+def embed_stdio(args: argparse.Namespace) -> None:
+    """embed with the cover, secret or output on stdin/stdout, done in memory"""
+    if is_stdio(args.cover) and is_stdio(args.secret):
+        print("Error: only one of --cover and --secret can be read from stdin.", file=sys.stderr)
+        sys.exit(1)
+
+    if args.in_place and is_stdio(args.cover):
+        print("Error: --in-place needs a cover file, not stdin.", file=sys.stderr)
+        sys.exit(1)
+
+    cover = read_stdin_mp3() if is_stdio(args.cover) else reader.read_mp3_bytes(args.cover)
+    if is_stdio(args.secret):
+        secret = read_stdin()
+        name = args.name or "secret.bin"
+    else:
+        secret = reader.read_secret_file(args.secret).content
+        name = args.name or args.secret.name
+
+    stego = embed_bytes(
+        cover,
+        secret,
+        name,
+        args.lsb_count,
+        encrypt=args.cipher,
+        key=args.key,
+        random_position=args.random,
+    )
+
+    output = args.cover if args.in_place else args.output
+    if is_stdio(output):
+        write_stdout(stego)
+    else:
+        writter.write_mp3_bytes(output, stego)
+    print(f"Successfully embedded '{name}' ({len(secret)} bytes)", file=sys.stderr)
+
+
+def extract_stdio(args: argparse.Namespace) -> None:
+    """extract writing the payload to stdout, progress and the filename go to stderr"""
+    source = read_stdin_mp3() if is_stdio(args.input) else args.input
+    start, end = args.byte_range or (0, None)
+
+    with contextlib.redirect_stdout(sys.stderr):
+        info, payload = extract_range(
+            source,
+            start,
+            end,
+            encrypted=args.cipher,
+            key=args.key,
+            random_position=args.random,
+            max_scan=legacy_max_scan(args),
+        )
+
+    write_stdout(payload)
+    if args.name_file is not None:
+        args.name_file.write_text(info.filename + "\n", encoding="utf-8")
+    else:
+        print(info.filename, file=sys.stderr)
+
+
+def print_comparison(original: Path, modified: Path, psnr_value: float) -> None:
+    print("\n" + "---" * 10)
+    print("    Comparison Complete")
+    print(f"     Original: {original}")
+    print(f"     Modified: {modified}")
+    print(f"     PSNR Value: {psnr_value:.4f} dB")
+    print("---" * 10)
+
+
+def absolute(path: Path | None) -> str | None:
+    """Paths are sent to the daemon absolute, it may run in another directory"""
+    return None if path is None else os.path.abspath(path)
+
+
+def run_on_daemon(args: argparse.Namespace) -> None:
+    """Forward the command to a daemon started with main.py serve"""
+    from service import DaemonClient
+
+    paths = [getattr(args, name, None) for name in ("cover", "secret", "output")]
+    paths += args.input if args.command == "inspect" else [getattr(args, "input", None)]
+    if any(is_stdio(path) for path in paths):
+        print("Error: --daemon needs file paths, not -.", file=sys.stderr)
+        sys.exit(1)
+
+    random_position = getattr(args, "random", False)
+
+    def report(response: dict) -> bool:
+        print(response.get("log", ""), end="")
+        if not response["ok"]:
+            print(response["error"], file=sys.stderr)
+        return response["ok"]
+
+    try:
+        with DaemonClient(args.daemon) as client:
+            if args.command == "embed":
+                response = client.call(
+                    "embed",
+                    audio_path=absolute(args.cover),
+                    file_to_hide_path=absolute(args.secret),
+                    output_path=absolute(args.output),
+                    bits_per_sample=args.lsb_count,
+                    encrypt=args.cipher,
+                    key=args.key,
+                    random_position=random_position,
+                    in_place=args.in_place,
+                )
+                ok = report(response)
+
+            elif args.command == "extract" and args.header_only:
+                response = client.call(
+                    "extract_info",
+                    stego_audio_path=absolute(args.input),
+                    key=args.key,
+                    random_position=random_position,
+                    max_scan=legacy_max_scan(args),
+                )
+                ok = report(response)
+                if ok:
+                    print(f"Filename: {response['result']['filename']}")
+                    print(f"Payload size: {response['result']['payload_len']} bytes")
+
+            elif args.command == "extract":
+                response = client.call(
+                    "extract",
+                    stego_audio_path=absolute(args.input),
+                    output_path=absolute(args.output),
+                    encrypted=args.cipher,
+                    key=args.key,
+                    random_position=random_position,
+                    byte_range=args.byte_range,
+                    max_scan=legacy_max_scan(args),
+                )
+                ok = report(response)
+
+            elif args.command == "inspect":
+                ok = True
+                for path in args.input:
+                    response = client.call(
+                        "inspect",
+                        stego_audio_path=absolute(path),
+                        key=args.key,
+                        random_position=random_position,
+                        max_scan=legacy_max_scan(args),
+                    )
+                    if response["ok"]:
+                        print(json.dumps(response["result"]), flush=True)
+                    else:
+                        print(json.dumps({"path": str(path), "error": response["error"]}))
+                        ok = False
+
+            else:
+                response = client.call(
+                    "compare",
+                    original_path=absolute(args.original),
+                    modified_path=absolute(args.modified),
+                )
+                ok = report(response)
+                if ok:
+                    print_comparison(args.original, args.modified, response["result"])
+
+    except DaemonError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    if not ok:
+        sys.exit(1)
 
 
 def main() -> None:
@@ -24,14 +239,18 @@ def main() -> None:
         "embed", help="Embed a secret message into a cover MP3."
     )
     embed_parser.add_argument(
-        "-c", "--cover", type=Path, required=True, help="Path to the cover MP3 file."
+        "-c",
+        "--cover",
+        type=Path,
+        required=True,
+        help="Path to the cover MP3 file, - reads it from stdin.",
     )
     embed_parser.add_argument(
         "-s",
         "--secret",
         type=Path,
         required=True,
-        help="Path to the secret message file.",
+        help="Path to the secret message file, - reads it from stdin.",
     )
     embed_parser.add_argument(
         "-n",
@@ -45,8 +264,17 @@ def main() -> None:
         "-o",
         "--output",
         type=Path,
-        required=True,
-        help="Path to save the stego MP3 file.",
+        help="Path to save the stego MP3 file, - writes it to stdout (required unless --in-place).",
+    )
+    embed_parser.add_argument(
+        "--name",
+        type=str,
+        help="Filename stored for a secret read from stdin (default: secret.bin).",
+    )
+    embed_parser.add_argument(
+        "--in-place",
+        action="store_true",
+        help="Embed directly into the cover MP3 file instead of writing --output.",
     )
     embed_parser.add_argument(
         "--random",
@@ -69,14 +297,25 @@ def main() -> None:
         "extract", help="Extract a hidden secret message from a stego MP3."
     )
     extract_parser.add_argument(
-        "-i", "--input", type=Path, required=True, help="Path to the stego MP3 file."
+        "-i",
+        "--input",
+        type=Path,
+        required=True,
+        help="Path to the stego MP3 file, - reads it from stdin.",
     )
     extract_parser.add_argument(
         "-o",
         "--output",
         type=Path,
-        required=True,
-        help="Path or folder to save the extracted secret message.",
+        help=(
+            "Path or folder to save the extracted secret message (required unless --header-only).\n"
+            "- writes the payload to stdout and the hidden filename to stderr."
+        ),
+    )
+    extract_parser.add_argument(
+        "--name-file",
+        type=Path,
+        help="With --output -, write the hidden filename to this file instead of stderr.",
     )
     extract_parser.add_argument(
         "--random",
@@ -93,6 +332,41 @@ def main() -> None:
         action="store_true",
         help="Encrypt the embedded file using Vigenere cipher"
     )
+    extract_parser.add_argument(
+        "--range",
+        type=byte_range_arg,
+        dest="byte_range",
+        metavar="START:END",
+        help="Only extract payload bytes START to END (either may be left out).",
+    )
+    extract_parser.add_argument(
+        "--header-only",
+        action="store_true",
+        help="Only print the hidden filename and payload size.",
+    )
+
+    # ----- Inspect -----
+    inspect_parser = subparsers.add_parser(
+        "inspect", help="Report hidden file metadata and capacity as JSON, without extracting."
+    )
+    inspect_parser.add_argument(
+        "-i",
+        "--input",
+        type=Path,
+        nargs="+",
+        required=True,
+        help="MP3 files to inspect, one JSON object per line is printed.",
+    )
+    inspect_parser.add_argument(
+        "--random",
+        action="store_true",
+        help="Randomized starting position was used (requires --key).",
+    )
+    inspect_parser.add_argument(
+        "--key",
+        type=str,
+        help="Key for randomizing start position"
+    )
 
     # ----- Compare -----
     compare_parser = subparsers.add_parser(
@@ -113,6 +387,100 @@ def main() -> None:
         help="Path to the stego or modified MP3 file.",
     )
 
+    # ----- Batch embed -----
+    batch_parser = subparsers.add_parser(
+        "batch-embed", help="Embed many secrets from a manifest on a process pool."
+    )
+    batch_parser.add_argument(
+        "-m",
+        "--manifest",
+        type=Path,
+        required=True,
+        help=(
+            "CSV (with a header row) or JSON lines file, one job per row with the fields\n"
+            "cover, secret, output, lsb, key, cipher, random, in_place.\n"
+            "Relative paths are taken from the manifest's folder."
+        ),
+    )
+    batch_parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        help="Number of worker processes (default: number of CPUs).",
+    )
+    batch_parser.add_argument(
+        "-n",
+        "--lsb-count",
+        type=int,
+        choices=[1, 2, 3, 4],
+        default=2,
+        help="LSBs for rows without an lsb field (default: 2).",
+    )
+
+    # ----- Daemon -----
+    serve_parser = subparsers.add_parser(
+        "serve", help="Run a daemon that keeps warm workers for --daemon clients."
+    )
+    serve_parser.add_argument(
+        "--socket", type=Path, required=True, help="Path of the Unix socket to listen on."
+    )
+    serve_parser.add_argument(
+        "--workers",
+        type=int,
+        help="Number of worker processes (default: number of CPUs).",
+    )
+
+    # ----- HTTP -----
+    http_parser = subparsers.add_parser(
+        "http", help="Run an HTTP service with /embed, /extract, /inspect and /compare."
+    )
+    http_parser.add_argument(
+        "--host", type=str, default="127.0.0.1", help="Address to listen on (default: 127.0.0.1)."
+    )
+    http_parser.add_argument(
+        "--port", type=int, default=8080, help="Port to listen on (default: 8080)."
+    )
+    http_parser.add_argument(
+        "--workers",
+        type=int,
+        help="Number of worker processes (default: number of CPUs).",
+    )
+    http_parser.add_argument(
+        "--queue",
+        type=int,
+        help="Requests that may wait for a worker before 503 is returned (default: 2 per worker).",
+    )
+    http_parser.add_argument(
+        "--max-body-mb",
+        type=int,
+        default=256,
+        help="Largest request body in MB (default: 256).",
+    )
+    http_parser.add_argument(
+        "--timeout",
+        type=float,
+        default=30,
+        help="Seconds a client may stall before it is disconnected (default: 30).",
+    )
+
+    for legacy_parser in (extract_parser, inspect_parser):
+        legacy_parser.add_argument(
+            "--legacy-layout",
+            action="store_true",
+            help=(
+                "Read files embedded by versions that only scanned the first 2 MB of frames.\n"
+                "Needed for random-position files and long payloads made by those versions."
+            ),
+        )
+
+    for daemon_parser in (embed_parser, extract_parser, inspect_parser, compare_parser):
+        daemon_parser.add_argument(
+            "--daemon",
+            type=Path,
+            metavar="SOCKET",
+            help="Run the command on the daemon listening on this socket (see serve).",
+        )
+
     args = parser.parse_args()
 
     # Validation for random option
@@ -120,7 +488,29 @@ def main() -> None:
         print("Error: --random option requires --key to be provided.", file=sys.stderr)
         sys.exit(1)
 
-    if args.command == "embed":
+    if args.command == "embed" and not args.in_place and args.output is None:
+        print("Error: --output is required unless --in-place is used.", file=sys.stderr)
+        sys.exit(1)
+
+    if args.command == "extract" and not args.header_only and args.output is None:
+        print("Error: --output is required unless --header-only is used.", file=sys.stderr)
+        sys.exit(1)
+
+    if args.command == "extract" and args.header_only and args.byte_range is not None:
+        extract_parser.error("--range cannot be used with --header-only")
+
+    if args.command == "extract" and args.name_file is not None and not is_stdio(args.output):
+        extract_parser.error("--name-file needs --output -")
+
+    if getattr(args, "daemon", None) is not None:
+        run_on_daemon(args)
+
+    elif args.command == "embed" and (
+        is_stdio(args.cover) or is_stdio(args.secret) or is_stdio(args.output)
+    ):
+        embed_stdio(args)
+
+    elif args.command == "embed":
         embed(
             args.cover,
             args.secret,
@@ -129,37 +519,106 @@ def main() -> None:
             encrypt=args.cipher,
             key=args.key,
             random_position=getattr(args, "random", False),
+            in_place=args.in_place,
+        )
+
+    elif args.command == "extract" and args.header_only:
+        info = extract_info(
+            read_stdin_mp3() if is_stdio(args.input) else args.input,
+            key=args.key,
+            random_position=getattr(args, "random", False),
+            max_scan=legacy_max_scan(args),
         )
+        print(f"Filename: {info.filename}")
+        print(f"Payload size: {info.payload_len} bytes")
+
+    elif args.command == "extract" and is_stdio(args.output):
+        extract_stdio(args)
 
     elif args.command == "extract":
         extract(
-            args.input,
+            read_stdin_mp3() if is_stdio(args.input) else args.input,
             args.output,
             encrypted=args.cipher,
             key=args.key,
             random_position=getattr(args, "random", False),
+            byte_range=args.byte_range,
+            max_scan=legacy_max_scan(args),
         )
 
+    elif args.command == "inspect":
+        failed = False
+        for path in args.input:
+            try:
+                report = inspect(
+                    path,
+                    key=args.key,
+                    random_position=args.random,
+                    max_scan=legacy_max_scan(args),
+                )
+            except Exception as e:
+                report = {"path": str(path), "error": f"[{type(e).__name__}] {e}"}
+                failed = True
+            print(json.dumps(report), flush=True)
+        if failed:
+            sys.exit(1)
+
     elif args.command == "compare":
         try:
             psnr_value = compare_mp3_files(args.original, args.modified)
-
-            print("\n" + "---" * 10)
-            print("    Comparison Complete")
-            print(f"     Original: {args.original}")
-            print(f"     Modified: {args.modified}")
-            print(f"     PSNR Value: {psnr_value:.4f} dB")
-            print("---" * 10)
+            print_comparison(args.original, args.modified, psnr_value)
 
         except Exception as e:
             exc_type = type(e).__name__
             print(f"[{exc_type}] Failed to compare: {e}", file=sys.stderr)
             sys.exit(1)
 
+    elif args.command == "batch-embed":
+        from service.batch import read_manifest, run_batch
+
+        try:
+            jobs = read_manifest(str(args.manifest), args.lsb_count)
+        except OSError as e:
+            print(f"Error: cannot read manifest: {e}", file=sys.stderr)
+            sys.exit(1)
+
+        failed = 0
+        for result in run_batch(jobs, args.jobs):
+            failed += not result["ok"]
+            print(json.dumps(result), flush=True)
+        print(f"{len(jobs) - failed} of {len(jobs)} jobs embedded", file=sys.stderr)
+        if failed:
+            sys.exit(1)
+
+    elif args.command == "serve":
+        from service import serve
+
+        try:
+            serve(str(args.socket), args.workers)
+        except DaemonError as e:
+            print(f"Error: {e}", file=sys.stderr)
+            sys.exit(1)
+
+    elif args.command == "http":
+        from service import serve_http
+
+        serve_http(
+            args.host,
+            args.port,
+            args.workers,
+            args.queue,
+            args.max_body_mb * 1024 * 1024,
+            args.timeout,
+        )
+
     elif args.command == "gui":
         try:
             print("Starting Audio Steganography GUI\n")
 
+            # The GUI framework is only loaded for this command
+            import flet as ft
+            from gui import run_gui
+
             ft.app(target=run_gui)
 
         except ImportError as e:
@@ -0,0 +1,4 @@
+from .batch import BatchJob, read_manifest, run_batch
+from .daemon import DaemonClient, StegoDaemon, serve
+from .http_server import StegoHTTPServer, serve_http
+from .jobs import JOBS, run_job
\ No newline at end of file
@@ -0,0 +1,213 @@
+import contextlib
+import csv
+import io
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import Future, ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, List
+from stego.stego import SIGNATURES, _plan_embed_file, _write_embed_output
+from utils.options import parse_flag
+
+
+@dataclass
+class BatchJob:
+    """One manifest row, paths are resolved against the manifest's directory"""
+
+    line: int
+    cover: str
+    secret: str
+    output: str | None
+    bits_per_sample: int = 2
+    encrypt: bool = False
+    key: str | None = None
+    random_position: bool = False
+    in_place: bool = False
+
+    def size(self) -> int:
+        """Bytes of cover and secret, the order jobs are scheduled in"""
+        total = 0
+        for path in (self.cover, self.secret):
+            try:
+                total += os.path.getsize(path)
+            except OSError:
+                pass
+        return total
+
+
+def _parse_row(line: int, row: Dict[str, Any], base: str, bits_per_sample: int) -> BatchJob:
+    def path(name: str) -> str | None:
+        value = row.get(name)
+        if value in (None, ""):
+            return None
+        return os.path.join(base, os.path.expanduser(str(value)))
+
+    cover, secret, output = path("cover"), path("secret"), path("output")
+    in_place = parse_flag(row.get("in_place"))
+    if cover is None or secret is None:
+        raise ValueError("cover and secret are required")
+    if output is None and not in_place:
+        raise ValueError("output is required unless in_place is set")
+
+    lsb = row.get("lsb")
+    try:
+        lsb = bits_per_sample if lsb in (None, "") else int(lsb)
+    except ValueError:
+        raise ValueError(f"lsb must be an integer, got '{lsb}'")
+    if lsb not in SIGNATURES:
+        raise ValueError(f"lsb must be 1-4, got {lsb}")
+
+    return BatchJob(
+        line=line,
+        cover=cover,
+        secret=secret,
+        output=output,
+        bits_per_sample=lsb,
+        encrypt=parse_flag(row.get("cipher")),
+        key=None if row.get("key") in (None, "") else str(row["key"]),
+        random_position=parse_flag(row.get("random")),
+        in_place=in_place,
+    )
+
+
+def read_manifest(path: str, bits_per_sample: int = 2) -> List[BatchJob | dict]:
+    """
+    Read a batch manifest, CSV with a header row when the file ends in .csv,
+    JSON lines otherwise.
+
+    Fields: cover, secret, output (required unless in_place), lsb, key, cipher,
+    random, in_place. Rows without lsb use bits_per_sample
+
+    Returns:
+        list: A BatchJob per row, or its failed result when the row is invalid
+    """
+    base = os.path.dirname(os.path.abspath(path))
+    with open(path, newline="", encoding="utf-8") as f:
+        if path.lower().endswith(".csv"):
+            # Line 1 is the header
+            rows = enumerate(csv.DictReader(f), start=2)
+        else:
+            rows = (
+                (number, line)
+                for number, line in enumerate(f, start=1)
+                if line.strip() and not line.lstrip().startswith("#")
+            )
+
+        jobs: List[BatchJob | dict] = []
+        for number, row in rows:
+            try:
+                if isinstance(row, str):
+                    row = json.loads(row)
+                    if not isinstance(row, dict):
+                        raise ValueError("Expected a JSON object")
+                jobs.append(_parse_row(number, row, base, bits_per_sample))
+            except ValueError as e:
+                jobs.append(
+                    {"line": number, "ok": False, "error": f"[{type(e).__name__}] {e}"}
+                )
+    return jobs
+
+
+def _result(job: BatchJob, **fields) -> dict:
+    return {
+        "line": job.line,
+        "cover": job.cover,
+        "secret": job.secret,
+        "output": job.cover if job.in_place else job.output,
+        "lsb": job.bits_per_sample,
+        **fields,
+    }
+
+
+def run_embed_job(job: BatchJob) -> dict:
+    """
+    Embed one manifest row
+
+    Returns:
+        dict: The row, "ok", the timings in seconds and, once the plan is made,
+        "capacity_bytes" at the row's LSB depth; "error" when it failed.
+        Without a random start the cover is only scanned until the secret fits,
+        then "capacity_exact" is false and the capacity is a lower bound
+    """
+    result = _result(job)
+    started = time.perf_counter()
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            plan = _plan_embed_file(
+                job.cover,
+                job.secret,
+                job.bits_per_sample,
+                job.encrypt,
+                job.key,
+                job.random_position,
+            )
+            result["payload_bytes"] = plan.payload_len
+            result["capacity_bytes"] = plan.usable_positions * job.bits_per_sample // 8
+            result["capacity_exact"] = plan.complete
+            planned = time.perf_counter()
+
+            _write_embed_output(
+                job.cover,
+                job.output,
+                job.in_place,
+                plan.positions,
+                plan.values,
+                plan.filename,
+                plan.payload_len,
+            )
+            written = time.perf_counter()
+    except Exception as e:
+        result.update(
+            ok=False,
+            error=f"[{type(e).__name__}] {e}",
+            seconds=round(time.perf_counter() - started, 4),
+        )
+        return result
+
+    result.update(
+        ok=True,
+        plan_seconds=round(planned - started, 4),
+        write_seconds=round(written - planned, 4),
+        seconds=round(written - started, 4),
+    )
+    return result
+
+
+def run_batch(jobs: List[BatchJob | dict], workers: int | None = None) -> Iterator[dict]:
+    """
+    Run manifest jobs on a process pool, largest cover and secret first
+
+    A failed job does not stop the others, results are yielded as jobs finish
+    and invalid rows are yielded first
+
+    Args:
+        jobs: read_manifest output
+        workers (int): Worker processes (default: number of CPUs), 1 runs in this process
+    """
+    runnable = []
+    for job in jobs:
+        if isinstance(job, BatchJob):
+            runnable.append(job)
+        else:
+            yield job
+
+    runnable.sort(key=BatchJob.size, reverse=True)
+    workers = min(workers or os.cpu_count() or 1, len(runnable))
+    if workers <= 1:
+        for job in runnable:
+            yield run_embed_job(job)
+        return
+
+    # Workers take jobs in submission order, the largest start first
+    with ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+        futures: Dict[Future, BatchJob] = {
+            pool.submit(run_embed_job, job): job for job in runnable
+        }
+        for future in as_completed(futures):
+            try:
+                yield future.result()
+            except Exception as e:
+                # The worker died, the job itself did not raise
+                yield _result(futures[future], ok=False, error=f"[{type(e).__name__}] {e}")
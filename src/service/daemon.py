@@ -0,0 +1,161 @@
+import os
+import signal
+import socket
+import socketserver
+import stat
+import sys
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any
+from service.jobs import JOBS, run_job
+from service.pool import WorkerPool
+from service.protocol import recv_message, send_message
+from utils.exceptions import DaemonError
+
+
+class _JobHandler(socketserver.BaseRequestHandler):
+    """Answers the requests of one client connection, in order"""
+
+    def handle(self) -> None:
+        while True:
+            try:
+                request = recv_message(self.request)
+            except (EOFError, DaemonError, OSError):
+                return
+            try:
+                send_message(self.request, self.server.run(request))
+            except OSError:
+                return
+
+
+class StegoDaemon(socketserver.ThreadingUnixStreamServer):
+    """
+    Unix socket server running jobs on a pool of worker processes that have the
+    stego engine and PSNR stack already imported.
+
+    A request is {"op": name, "params": {...}}, the answer is the run_job result.
+    The "ping" op is answered by the server itself. A job whose worker dies is
+    answered with an error and the pool is restarted
+    """
+
+    daemon_threads = True
+
+    def __init__(self, socket_path: str, workers: int | None = None):
+        self.socket_path = socket_path
+        self.pool = WorkerPool(workers)
+        self.workers = self.pool.workers
+        try:
+            super().__init__(socket_path, _JobHandler)
+        except BaseException:
+            self.pool.shutdown()
+            raise
+
+    def run(self, request: Any) -> dict:
+        if not isinstance(request, dict) or not isinstance(request.get("params", {}), dict):
+            return {"ok": False, "error": "Malformed request", "log": ""}
+
+        op = request.get("op")
+        if op == "ping":
+            return {"ok": True, "result": "pong", "log": ""}
+        if op not in JOBS:
+            return {"ok": False, "error": f"Unknown job '{op}'", "log": ""}
+        try:
+            return self.pool.run(run_job, op, request.get("params", {}))
+        except BrokenProcessPool:
+            # The pool is replaced, the job may have written part of its output
+            return {
+                "ok": False,
+                "error": "[DaemonError] A worker process died running the job, the pool was restarted",
+                "log": "",
+            }
+
+    def server_close(self) -> None:
+        super().server_close()
+        self.pool.shutdown()
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+
+
+def _remove_stale_socket(socket_path: str) -> None:
+    """Remove a socket left by a daemon that did not shut down, refuse if one is running"""
+    try:
+        mode = os.stat(socket_path).st_mode
+    except FileNotFoundError:
+        return
+    if not stat.S_ISSOCK(mode):
+        raise DaemonError(f"{socket_path} exists and is not a socket")
+
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+        try:
+            probe.connect(socket_path)
+        except (ConnectionRefusedError, FileNotFoundError):
+            os.unlink(socket_path)
+            return
+    raise DaemonError(f"A daemon is already listening on {socket_path}")
+
+
+def serve(socket_path: str, workers: int | None = None) -> None:
+    """Run the daemon until interrupted (Ctrl+C or SIGTERM)"""
+    _remove_stale_socket(socket_path)
+
+    # Stop through the same path as Ctrl+C
+    def on_terminate(signum, frame):
+        raise KeyboardInterrupt
+
+    signal.signal(signal.SIGTERM, on_terminate)
+
+    with StegoDaemon(socket_path, workers) as server:
+        print(f"Listening on {socket_path} with {server.workers} workers", flush=True)
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            print("Shutting down", file=sys.stderr)
+
+
+# Seconds a client waits for one answer, a job on a large file can take minutes
+DEFAULT_CLIENT_TIMEOUT = 600
+
+
+class DaemonClient:
+    """
+    Connection to a StegoDaemon, jobs are sent one at a time
+
+    Args:
+        socket_path (str): Path of the daemon socket
+        timeout (float): Seconds to wait for each answer, None waits forever
+    """
+
+    def __init__(self, socket_path: str, timeout: float | None = DEFAULT_CLIENT_TIMEOUT):
+        self.timeout = timeout
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(timeout)
+        try:
+            self.sock.connect(str(socket_path))
+        except OSError as e:
+            self.sock.close()
+            raise DaemonError(f"Cannot connect to daemon at {socket_path}: {e}") from e
+
+    def close(self) -> None:
+        self.sock.close()
+
+    def __enter__(self) -> "DaemonClient":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def call(self, op: str, **params) -> dict:
+        """
+        Run a job on the daemon
+
+        Returns:
+            dict: the run_job answer, with "ok", "result" or "error", and "log"
+        """
+        try:
+            send_message(self.sock, {"op": op, "params": params})
+            return recv_message(self.sock)
+        except EOFError as e:
+            raise DaemonError("Daemon closed the connection") from e
+        except TimeoutError as e:
+            raise DaemonError(f"No answer from the daemon within {self.timeout} seconds") from e
+        except OSError as e:
+            raise DaemonError(f"Daemon connection failed: {e}") from e
@@ -0,0 +1,439 @@
+import json
+import mmap
+import os
+import re
+import shutil
+import signal
+import sys
+import tempfile
+import threading
+from concurrent.futures.process import BrokenProcessPool
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Tuple
+from urllib.parse import parse_qs, quote, urlsplit
+from service.jobs import Span, compare_spans, embed_span, extract_span, inspect_span
+from service.pool import WorkerPool
+from stego.frames import LEGACY_MAX_SCAN
+from utils.exceptions import IOReaderError, StegoCompareError
+from utils.options import parse_byte_range, parse_flag
+
+# Largest request body accepted
+DEFAULT_MAX_BODY = 256 * 1024 * 1024
+
+# Request bodies are spooled to disk and responses sent this many bytes at a time
+READ_CHUNK = 1 << 20
+
+# Seconds a client may stall while sending or receiving before the request is dropped
+DEFAULT_TIMEOUT = 30
+
+# Longest header block of one multipart part
+MAX_PART_HEADERS = 16 * 1024
+
+# name=value and name="quoted value" parameters of a header such as Content-Type
+_HEADER_PARAM = re.compile(r';\s*([^\s;=]+)\s*=\s*("(?:[^"\\]|\\.)*"|[^;]*)')
+
+
+class _HttpError(Exception):
+    def __init__(self, status: HTTPStatus, message: str, headers: Dict[str, str] | None = None):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+        self.headers = headers
+
+
+def _flag(query: Dict[str, str], name: str) -> bool:
+    return parse_flag(query.get(name, ""))
+
+
+def _header_params(value: str) -> Tuple[str, Dict[str, str]]:
+    """Split a header value into its lowercased main value and its parameters"""
+    main, _, rest = value.partition(";")
+    params = {}
+    for name, param in _HEADER_PARAM.findall(";" + rest):
+        param = param.strip()
+        if param.startswith('"'):
+            param = re.sub(r"\\(.)", r"\1", param[1:-1])
+        params[name.lower()] = param
+    return main.strip().lower(), params
+
+
+def _parse_multipart(content_type: str, body: Span) -> Dict[str, Tuple[str | None, Span]]:
+    """
+    Fields of a spooled multipart/form-data body as name -> (filename, span of the
+    content). The body is split on its boundary, the contents are not read
+    """
+    media_type, params = _header_params(content_type)
+    if media_type != "multipart/form-data":
+        raise _HttpError(HTTPStatus.UNSUPPORTED_MEDIA_TYPE, "Expected multipart/form-data")
+    if not params.get("boundary"):
+        raise _HttpError(HTTPStatus.BAD_REQUEST, "Missing multipart boundary")
+
+    malformed = _HttpError(HTTPStatus.BAD_REQUEST, "Malformed multipart body")
+    delimiter = b"--" + params["boundary"].encode("latin-1")
+    path, start, end = body
+    if start >= end:
+        raise malformed
+
+    fields = {}
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        position = data.find(delimiter, start, end)
+        while position >= 0:
+            position += len(delimiter)
+            # The close delimiter ends the body
+            if data[position : position + 2] == b"--":
+                return fields
+
+            line_end = data.find(b"\r\n", position, end)
+            if line_end < 0:
+                break
+            headers_end = data.find(
+                b"\r\n\r\n", line_end, min(end, line_end + MAX_PART_HEADERS)
+            )
+            if headers_end < 0:
+                break
+            content_start = headers_end + 4
+            content_end = data.find(b"\r\n" + delimiter, content_start, end)
+            if content_end < 0:
+                break
+
+            headers = data[line_end + 2 : headers_end].decode("utf-8", "replace")
+            for line in headers.split("\r\n"):
+                name, _, value = line.partition(":")
+                if name.strip().lower() != "content-disposition":
+                    continue
+                _, disposition = _header_params(value)
+                if disposition.get("name"):
+                    fields[disposition["name"]] = (
+                        disposition.get("filename"),
+                        (path, content_start, content_end),
+                    )
+            position = content_end + 2
+    raise malformed
+
+
+def _max_scan(query: Dict[str, str]) -> int | None:
+    return LEGACY_MAX_SCAN if _flag(query, "legacy") else None
+
+
+def _require(fields: Dict[str, Tuple[str | None, Span]], *names: str) -> None:
+    missing = [name for name in names if name not in fields]
+    if missing:
+        raise _HttpError(HTTPStatus.BAD_REQUEST, f"Missing form fields: {', '.join(missing)}")
+
+
+class _StegoRequestHandler(BaseHTTPRequestHandler):
+    """
+    POST /embed    multipart cover + secret    -> stego MP3
+    POST /extract  stego MP3 body              -> payload, hidden filename in X-Filename
+    POST /inspect  MP3 body                    -> JSON report
+    POST /compare  multipart original + modified -> JSON {"psnr": dB}
+    GET  /health                               -> JSON load of the server
+
+    Options are query parameters: lsb, key, cipher, random, filename, range, legacy
+    """
+
+    protocol_version = "HTTP/1.1"
+    server: "StegoHTTPServer"
+
+    def setup(self) -> None:
+        # Applies to every read and write of the connection, a stalled client
+        # gives up its admission slot after this many seconds
+        self.timeout = self.server.request_timeout
+        super().setup()
+
+    def do_GET(self) -> None:
+        if urlsplit(self.path).path != "/health":
+            self._send_json(HTTPStatus.NOT_FOUND, {"error": "Not found"})
+            return
+        self._send_json(HTTPStatus.OK, self.server.load())
+
+    def do_POST(self) -> None:
+        url = urlsplit(self.path)
+        route = self.ROUTES.get(url.path)
+        if route is None:
+            self.close_connection = True
+            self._send_json(HTTPStatus.NOT_FOUND, {"error": "Not found"})
+            return
+
+        # Refuse before reading the body, the connection is closed instead
+        if not self.server.admit():
+            self.close_connection = True
+            self._send_json(
+                HTTPStatus.SERVICE_UNAVAILABLE,
+                {"error": "Server busy, retry later"},
+                {"Retry-After": "1"},
+            )
+            return
+
+        # Spooled bodies and responses of this request, removed once it is answered
+        self._spooled: List[str] = []
+        try:
+            body = self._read_body()
+            query = {name: values[-1] for name, values in parse_qs(url.query).items()}
+            route(self, body, query)
+        except _HttpError as e:
+            self._send_json(e.status, {"error": e.message}, e.headers)
+        except (ValueError, IOReaderError, StegoCompareError) as e:
+            self._send_json(HTTPStatus.BAD_REQUEST, {"error": f"[{type(e).__name__}] {e}"})
+        except Exception as e:
+            self.log_error("%s failed: %r", url.path, e)
+            self._send_json(
+                HTTPStatus.INTERNAL_SERVER_ERROR, {"error": f"[{type(e).__name__}] {e}"}
+            )
+        finally:
+            for path in self._spooled:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            self.server.release()
+
+    def _spool_file(self) -> Tuple[int, str]:
+        """A new file in the server's spool directory, removed after the request"""
+        fd, path = tempfile.mkstemp(dir=self.server.spool_dir)
+        self._spooled.append(path)
+        return fd, path
+
+    def _read_body(self) -> Span:
+        """Spool the request body to a file, only READ_CHUNK bytes are in memory at once"""
+        length = self.headers.get("Content-Length")
+        if length is None:
+            self.close_connection = True
+            raise _HttpError(HTTPStatus.LENGTH_REQUIRED, "Content-Length is required")
+        try:
+            length = int(length)
+        except ValueError:
+            self.close_connection = True
+            raise _HttpError(HTTPStatus.BAD_REQUEST, "Invalid Content-Length")
+        if length > self.server.max_body:
+            self.close_connection = True
+            raise _HttpError(
+                HTTPStatus.REQUEST_ENTITY_TOO_LARGE,
+                f"Body over the {self.server.max_body} byte limit",
+            )
+
+        fd, path = self._spool_file()
+        chunk = memoryview(bytearray(min(length, READ_CHUNK)))
+        received = 0
+        with open(fd, "wb") as f:
+            while received < length:
+                try:
+                    count = self.rfile.readinto(chunk[: length - received])
+                except TimeoutError:
+                    self.close_connection = True
+                    raise _HttpError(HTTPStatus.REQUEST_TIMEOUT, "Timed out reading the body")
+                if not count:
+                    self.close_connection = True
+                    raise _HttpError(HTTPStatus.BAD_REQUEST, "Body shorter than Content-Length")
+                f.write(chunk[:count])
+                received += count
+        return path, 0, length
+
+    def _send_headers(self, status: HTTPStatus, content_type: str, length: int, headers) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(length))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        if self.close_connection:
+            self.send_header("Connection", "close")
+        self.end_headers()
+
+    def _send(self, status: HTTPStatus, body: bytes, content_type: str, headers=None) -> None:
+        self._send_headers(status, content_type, len(body), headers)
+        self.wfile.write(body)
+
+    def _send_file(self, status: HTTPStatus, path: str, content_type: str, headers=None) -> None:
+        with open(path, "rb") as f:
+            self._send_headers(status, content_type, os.fstat(f.fileno()).st_size, headers)
+            shutil.copyfileobj(f, self.wfile, READ_CHUNK)
+
+    def _send_json(self, status: HTTPStatus, document: Any, headers=None) -> None:
+        self._send(status, json.dumps(document).encode("utf-8"), "application/json", headers)
+
+    def _output_file(self) -> str:
+        fd, path = self._spool_file()
+        os.close(fd)
+        return path
+
+    def _embed(self, body: Span, query: Dict[str, str]) -> None:
+        fields = _parse_multipart(self.headers.get("Content-Type", ""), body)
+        _require(fields, "cover", "secret")
+        secret_name, secret = fields["secret"]
+        filename = query.get("filename") or secret_name or "secret.bin"
+        try:
+            bits_per_sample = int(query.get("lsb", "2"))
+        except ValueError:
+            raise _HttpError(HTTPStatus.BAD_REQUEST, "lsb must be an integer")
+
+        output_path = self._output_file()
+        self.server.run(
+            embed_span,
+            fields["cover"][1],
+            secret,
+            filename,
+            output_path,
+            bits_per_sample=bits_per_sample,
+            encrypt=_flag(query, "cipher"),
+            key=query.get("key"),
+            random_position=_flag(query, "random"),
+        )
+        self._send_file(HTTPStatus.OK, output_path, "audio/mpeg")
+
+    def _extract(self, body: Span, query: Dict[str, str]) -> None:
+        try:
+            start, end = parse_byte_range(query["range"]) if "range" in query else (0, None)
+        except ValueError as e:
+            raise _HttpError(HTTPStatus.BAD_REQUEST, str(e))
+        output_path = self._output_file()
+        filename = self.server.run(
+            extract_span,
+            body,
+            output_path,
+            start,
+            end,
+            encrypted=_flag(query, "cipher"),
+            key=query.get("key"),
+            random_position=_flag(query, "random"),
+            max_scan=_max_scan(query),
+        )
+        quoted = quote(filename)
+        headers = {
+            "X-Filename": quoted,
+            "Content-Disposition": f"attachment; filename*=UTF-8''{quoted}",
+        }
+        self._send_file(HTTPStatus.OK, output_path, "application/octet-stream", headers)
+
+    def _inspect(self, body: Span, query: Dict[str, str]) -> None:
+        report = self.server.run(
+            inspect_span,
+            body,
+            key=query.get("key"),
+            random_position=_flag(query, "random"),
+            max_scan=_max_scan(query),
+        )
+        self._send_json(HTTPStatus.OK, report)
+
+    def _compare(self, body: Span, query: Dict[str, str]) -> None:
+        fields = _parse_multipart(self.headers.get("Content-Type", ""), body)
+        _require(fields, "original", "modified")
+        psnr = self.server.run(compare_spans, fields["original"][1], fields["modified"][1])
+        self._send_json(HTTPStatus.OK, {"psnr": psnr})
+
+    ROUTES: Dict[str, Callable[["_StegoRequestHandler", Span, Dict[str, str]], None]] = {
+        "/embed": _embed,
+        "/extract": _extract,
+        "/inspect": _inspect,
+        "/compare": _compare,
+    }
+
+
+class StegoHTTPServer(ThreadingHTTPServer):
+    """
+    HTTP server running requests on a process pool sized to the host.
+
+    At most workers + queue_size requests are admitted at once, the others get
+    503 with Retry-After before their body is read. Bodies and responses are
+    spooled to a temporary directory, workers map them instead of receiving copies
+
+    Args:
+        address: (host, port), port 0 picks a free one
+        workers (int): Worker processes (default: number of CPUs)
+        queue_size (int): Requests waiting for a worker (default: 2 per worker)
+        max_body (int): Largest request body in bytes
+        request_timeout (float): Seconds a client may stall before it is disconnected
+    """
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        address: Tuple[str, int],
+        workers: int | None = None,
+        queue_size: int | None = None,
+        max_body: int = DEFAULT_MAX_BODY,
+        request_timeout: float | None = DEFAULT_TIMEOUT,
+    ):
+        self.pool = WorkerPool(workers)
+        self.workers = self.pool.workers
+        self.queue_size = 2 * self.workers if queue_size is None else queue_size
+        self.max_body = max_body
+        self.request_timeout = request_timeout
+        self._pending = 0
+        self._pending_lock = threading.Lock()
+        self.spool_dir = tempfile.mkdtemp(prefix="stego-http-")
+        try:
+            super().__init__(address, _StegoRequestHandler)
+        except BaseException:
+            self.pool.shutdown()
+            shutil.rmtree(self.spool_dir, ignore_errors=True)
+            raise
+
+    def admit(self) -> bool:
+        with self._pending_lock:
+            if self._pending >= self.workers + self.queue_size:
+                return False
+            self._pending += 1
+            return True
+
+    def release(self) -> None:
+        with self._pending_lock:
+            self._pending -= 1
+
+    def load(self) -> dict:
+        with self._pending_lock:
+            pending = self._pending
+        return {
+            "status": "ok",
+            "workers": self.workers,
+            "pending": pending,
+            "max_pending": self.workers + self.queue_size,
+            "worker_restarts": self.pool.restarts,
+        }
+
+    def run(self, job: Callable[..., Any], *args, **kwargs) -> Any:
+        """Run job on the pool, a request whose worker died gets 503"""
+        try:
+            return self.pool.run(job, *args, **kwargs)
+        except BrokenProcessPool:
+            print("A worker process died, the pool was restarted", file=sys.stderr)
+            raise _HttpError(
+                HTTPStatus.SERVICE_UNAVAILABLE,
+                "A worker process died, retry later",
+                {"Retry-After": "1"},
+            )
+
+    def server_close(self) -> None:
+        super().server_close()
+        self.pool.shutdown()
+        shutil.rmtree(self.spool_dir, ignore_errors=True)
+
+
+def serve_http(
+    host: str,
+    port: int,
+    workers: int | None = None,
+    queue_size: int | None = None,
+    max_body: int = DEFAULT_MAX_BODY,
+    request_timeout: float | None = DEFAULT_TIMEOUT,
+) -> None:
+    """Run the HTTP server until interrupted (Ctrl+C or SIGTERM)"""
+
+    def on_terminate(signum, frame):
+        raise KeyboardInterrupt
+
+    signal.signal(signal.SIGTERM, on_terminate)
+
+    with StegoHTTPServer(
+        (host, port), workers, queue_size, max_body, request_timeout
+    ) as server:
+        bound_host, bound_port = server.server_address[:2]
+        print(
+            f"Serving on http://{bound_host}:{bound_port} with {server.workers} workers",
+            flush=True,
+        )
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            print("Shutting down", file=sys.stderr)
@@ -0,0 +1,140 @@
+import contextlib
+import io
+import mmap
+import os
+import tempfile
+from dataclasses import asdict
+from typing import Any, Callable, Dict, Iterator, Tuple
+from fileio import reader, writter
+from stego import (
+    compare_mp3_files,
+    embed,
+    extract,
+    extract_info,
+    extract_range,
+    inspect,
+)
+from stego.stego import _plan_embed_data
+
+
+def _extract_info(**params) -> dict:
+    return asdict(extract_info(**params))
+
+
+def _compare(**params) -> float:
+    return float(compare_mp3_files(**params))
+
+
+# Operations a worker runs, called with keyword arguments, results must be msgpack-able
+JOBS: Dict[str, Callable[..., Any]] = {
+    "embed": embed,
+    "extract": extract,
+    "extract_info": _extract_info,
+    "inspect": inspect,
+    "compare": _compare,
+}
+
+
+def run_job(op: str, params: dict) -> dict:
+    """
+    Run one job, capturing what it prints
+
+    Returns:
+        dict: {"ok": True, "result": ..., "log": str} or
+        {"ok": False, "error": str, "log": str}
+    """
+    log = io.StringIO()
+    try:
+        job = JOBS[op]
+    except KeyError:
+        return {"ok": False, "error": f"Unknown job '{op}'", "log": ""}
+
+    try:
+        with contextlib.redirect_stdout(log):
+            result = job(**params)
+    except Exception as e:
+        return {"ok": False, "error": f"[{type(e).__name__}] {e}", "log": log.getvalue()}
+    return {"ok": True, "result": result, "log": log.getvalue()}
+
+
+# A byte range [start, end) of a file. Request bodies reach the workers as spans of
+# the file they were spooled to, so they are not copied between processes
+Span = Tuple[str, int, int]
+
+
+@contextlib.contextmanager
+def open_span(span: Span) -> Iterator[memoryview]:
+    """Map the span of the file read-only, only the pages that are read are loaded"""
+    path, start, end = span
+    if start >= end:
+        yield memoryview(b"")
+        return
+
+    with open(path, "rb") as f:
+        data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    view = memoryview(data)[start:end]
+    try:
+        yield view
+    finally:
+        try:
+            view.release()
+            data.close()
+        except BufferError:
+            # An array over the view is still referenced (by a traceback), the
+            # mapping is closed once it is freed
+            pass
+
+
+def embed_span(cover: Span, secret: Span, filename: str, output_path: str, **options) -> None:
+    """embed_bytes for a worker process, the stego MP3 is written to output_path"""
+    with open_span(cover) as cover_data, open_span(secret) as payload:
+        positions, values = _plan_embed_data(
+            cover_data,
+            payload,
+            filename,
+            options.get("bits_per_sample", 2),
+            options.get("encrypt", False),
+            options.get("key"),
+            options.get("random_position", False),
+        )
+        with open(output_path, "wb") as out:
+            out.write(cover_data)
+    writter.patch_mp3_bytes(output_path, positions, values)
+
+
+def extract_span(
+    stego: Span, output_path: str, start: int = 0, end: int | None = None, **options
+) -> str:
+    """Write payload bytes [start, end) of stego data to output_path, return the hidden filename"""
+    with contextlib.redirect_stdout(io.StringIO()), open_span(stego) as data:
+        info, payload = extract_range(data, start, end, **options)
+    with open(output_path, "wb") as out:
+        out.write(payload)
+    return info.filename
+
+
+def inspect_span(stego: Span, **options) -> dict:
+    with open_span(stego) as data:
+        return inspect(data, **options)
+
+
+def compare_spans(original: Span, modified: Span) -> float:
+    """PSNR of two MP3s in spooled bodies, the decoder reads files so each is copied to one"""
+    with tempfile.TemporaryDirectory(prefix="stego-compare-") as directory:
+        paths = []
+        for name, span in (("original", original), ("modified", modified)):
+            path = os.path.join(directory, f"{name}.mp3")
+            with open_span(span) as data:
+                reader.check_mp3_signature(data, name.capitalize())
+                with open(path, "wb") as f:
+                    f.write(data)
+            paths.append(path)
+        return float(compare_mp3_files(*paths))
+
+
+def warm_up() -> None:
+    """Load the stego engine and the PSNR decoding stack before the first job"""
+    import librosa
+
+    # librosa loads its submodules (numba, scipy) on first attribute access
+    librosa.load
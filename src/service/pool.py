@@ -0,0 +1,61 @@
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable
+from service.jobs import warm_up
+
+
+class WorkerPool:
+    """
+    Spawned worker processes with the stego engine and PSNR stack already imported.
+
+    A worker that dies (killed, crashed in a native library) breaks the whole
+    executor. The jobs that were on it raise BrokenProcessPool and the executor
+    is replaced, so later jobs run on new workers
+
+    Args:
+        workers (int): Worker processes (default: number of CPUs)
+    """
+
+    def __init__(self, workers: int | None = None):
+        self.workers = workers or os.cpu_count() or 1
+        self.restarts = 0
+        self._lock = threading.Lock()
+        self.executor = self._new_executor()
+
+    def _new_executor(self) -> ProcessPoolExecutor:
+        # Spawned workers do not inherit the threads of the server
+        return ProcessPoolExecutor(
+            self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=warm_up,
+        )
+
+    def _replace(self, broken: ProcessPoolExecutor) -> None:
+        """Replace a broken executor once, however many jobs saw it break"""
+        with self._lock:
+            if self.executor is not broken:
+                return
+            self.executor = self._new_executor()
+            self.restarts += 1
+        broken.shutdown(wait=False, cancel_futures=True)
+
+    def run(self, job: Callable[..., Any], *args, **kwargs) -> Any:
+        """
+        Run job on a worker and wait for its result
+
+        Raises:
+            BrokenProcessPool: A worker died while the job was queued or running
+        """
+        executor = self.executor
+        try:
+            return executor.submit(job, *args, **kwargs).result()
+        except BrokenProcessPool:
+            self._replace(executor)
+            raise
+
+    def shutdown(self) -> None:
+        with self._lock:
+            self.executor.shutdown(cancel_futures=True)
@@ -0,0 +1,48 @@
+import socket
+import struct
+from typing import Any
+import msgpack
+from utils.exceptions import DaemonError
+
+# Each message is a 4-byte big-endian length followed by that many bytes of msgpack
+HEADER = struct.Struct(">I")
+
+# Largest message accepted, requests only carry paths and options
+MAX_MESSAGE_SIZE = 64 * 1024 * 1024
+
+
+def send_message(sock: socket.socket, message: Any) -> None:
+    payload = msgpack.packb(message, use_bin_type=True)
+    sock.sendall(HEADER.pack(len(payload)) + payload)
+
+
+def _recv_exactly(sock: socket.socket, size: int) -> bytes:
+    buffer = bytearray()
+    while len(buffer) < size:
+        chunk = sock.recv(min(size - len(buffer), 1 << 16))
+        if not chunk:
+            raise EOFError("Connection closed")
+        buffer += chunk
+    return bytes(buffer)
+
+
+def recv_message(sock: socket.socket) -> Any:
+    """
+    Read one message. Raises EOFError when the peer closed the connection between
+    messages, DaemonError when a message is cut short or too large
+    """
+    header = sock.recv(HEADER.size, socket.MSG_WAITALL)
+    if not header:
+        raise EOFError("Connection closed")
+    if len(header) < HEADER.size:
+        raise DaemonError("Truncated message header")
+
+    (size,) = HEADER.unpack(header)
+    if size > MAX_MESSAGE_SIZE:
+        raise DaemonError(f"Message of {size} bytes is over the {MAX_MESSAGE_SIZE} limit")
+
+    try:
+        payload = _recv_exactly(sock, size)
+    except EOFError as e:
+        raise DaemonError("Truncated message") from e
+    return msgpack.unpackb(payload, raw=False, strict_map_key=False)
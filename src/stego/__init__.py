@@ -1,2 +1,25 @@
+from .carrier import StegoCarrier
+from .frames import LEGACY_MAX_SCAN
 from .psnr import compare_mp3_files
-from .stego import embed, extract
\ No newline at end of file
+from .stego import (
+    detect_files,
+    embed,
+    embed_bytes,
+    extract,
+    extract_bytes,
+    extract_info,
+    extract_range,
+    inspect,
+)
+
+# The async API needs asyncio and concurrent.futures, which the CLI does not,
+# so stego.aio is only imported when one of its names is used
+_AIO = ("acompare", "aembed", "aextract", "get_executor", "set_executor")
+
+
+def __getattr__(name: str):
+    if name in _AIO:
+        from . import aio
+
+        return getattr(aio, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
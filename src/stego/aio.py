@@ -0,0 +1,147 @@
+import asyncio
+import functools
+import os
+import threading
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import Any, Callable, Tuple
+from stego.psnr import compare_mp3_files
+from stego.stego import (
+    _plan_embed_file,
+    _read_hidden_file,
+    _save_extracted_file,
+    _write_embed_output,
+)
+
+_executor: Executor | None = None
+_executor_lock = threading.Lock()
+
+
+def get_executor() -> Executor:
+    """
+    Executor the async API runs on when none is given, a thread pool with one
+    worker per CPU unless set_executor was called
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=os.cpu_count() or 1, thread_name_prefix="stego"
+            )
+        return _executor
+
+
+def set_executor(executor: Executor | None) -> None:
+    """
+    Run the async API on executor, its worker count bounds how many jobs run at
+    once. A ProcessPoolExecutor moves the work out of the event loop's process.
+    None goes back to the default thread pool. The previous executor is not shut down
+    """
+    global _executor
+    with _executor_lock:
+        _executor = executor
+
+
+async def _run(executor: Executor | None, job: Callable[..., Any], *args, **kwargs) -> Any:
+    """
+    Await job on executor. Cancelling the caller cancels a job still waiting
+    for a worker, a running job finishes and its result is dropped
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        executor or get_executor(), functools.partial(job, *args, **kwargs)
+    )
+
+
+async def aembed(
+    audio_path: str,
+    file_to_hide_path: str,
+    output_path: str | None,
+    bits_per_sample: int = 2,
+    encrypt: bool | None = False,
+    key: str | None = None,
+    random_position: bool | None = False,
+    in_place: bool = False,
+    executor: Executor | None = None,
+) -> None:
+    """
+    Async embed, the arguments are those of embed
+
+    Planning and writing run on the executor as two steps, nothing is written
+    when the call is cancelled before the plan is done
+
+    Args:
+        executor: Executor to run on (default: get_executor())
+    """
+    if not in_place and output_path is None:
+        raise ValueError("Provide an output path or embed in place")
+
+    plan = await _run(
+        executor,
+        _plan_embed_file,
+        audio_path,
+        file_to_hide_path,
+        bits_per_sample,
+        encrypt,
+        key,
+        random_position,
+    )
+    await _run(
+        executor,
+        _write_embed_output,
+        audio_path,
+        output_path,
+        in_place,
+        plan.positions,
+        plan.values,
+        plan.filename,
+        plan.payload_len,
+    )
+
+
+async def aextract(
+    stego_audio_path: str | os.PathLike | bytes | bytearray | memoryview,
+    output_path: str,
+    encrypted: bool | None = False,
+    key: str | None = None,
+    random_position: bool | None = False,
+    byte_range: Tuple[int, int | None] | None = None,
+    max_scan: int | None = None,
+    executor: Executor | None = None,
+) -> str:
+    """
+    Async extract, the arguments are those of extract
+
+    Nothing is written when the call is cancelled before the payload is read
+
+    Args:
+        executor: Executor to run on (default: get_executor())
+
+    Returns:
+        str: Full path to the extracted file
+    """
+    filename, payload = await _run(
+        executor,
+        _read_hidden_file,
+        stego_audio_path,
+        encrypted,
+        key,
+        random_position,
+        byte_range,
+        max_scan,
+    )
+    return await _run(executor, _save_extracted_file, output_path, filename, payload)
+
+
+async def acompare(
+    original_path: str, modified_path: str, executor: Executor | None = None
+) -> float:
+    """
+    Async compare_mp3_files
+
+    Args:
+        executor: Executor to run on (default: get_executor())
+
+    Returns:
+        float: PSNR in dB
+    """
+    return await _run(executor, compare_mp3_files, original_path, modified_path)
@@ -0,0 +1,177 @@
+import os
+import threading
+from typing import Dict, Tuple
+import numpy as np
+from fileio import reader
+from stego.frame_cache import FrameIndex, load_frame_index
+from stego.frames import FrameTable
+from stego.positions import UsablePositions
+from stego.stego import (
+    SIGNATURES,
+    _check_embed_options,
+    _extract_payload,
+    _quiet,
+    build_message_symbols,
+    detect_bits_per_sample,
+    plan_embed,
+)
+
+
+class StegoCarrier:
+    """
+    An MP3 parsed once and reused across embed, extract and detect calls.
+
+    The frame table, protected intervals, usable positions and capacities are computed
+    on first use and kept. Once computed they are only read, so one carrier can be
+    shared by threads extracting concurrently. The data must not change while the
+    carrier is in use.
+
+    Args:
+        source: MP3 path (mapped read-only), or the MP3 data as bytes, bytearray,
+            memoryview or mmap
+        use_cache (bool): Reuse frame tables from the on-disk cache
+    """
+
+    def __init__(
+        self,
+        source: str | os.PathLike | bytes | bytearray | memoryview,
+        use_cache: bool = True,
+    ):
+        if isinstance(source, (str, os.PathLike)):
+            self._mapping = reader.map_mp3_bytes(source)
+            self.data = self._mapping
+        else:
+            self._mapping = None
+            self.data = source
+        self.use_cache = use_cache
+
+        self._lock = threading.RLock()
+        self._index: FrameIndex | None = None
+        self._intervals: Tuple[np.ndarray, np.ndarray] | None = None
+        self._usable_positions: UsablePositions | None = None
+        self._capacity: Dict[int, int] | None = None
+
+    def close(self) -> None:
+        """Unmap the file when the carrier was opened from a path"""
+        if self._mapping is not None:
+            self._mapping.close()
+
+    def __enter__(self) -> "StegoCarrier":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    @property
+    def frame_index(self) -> FrameIndex:
+        if self._index is None:
+            with self._lock:
+                if self._index is None:
+                    self._index = load_frame_index(self.data, use_cache=self.use_cache)
+        return self._index
+
+    @property
+    def frames(self) -> FrameTable:
+        return self.frame_index.frames
+
+    def protected_intervals(self) -> Tuple[np.ndarray, np.ndarray]:
+        """(starts, ends) of the byte ranges of the frames that must not be modified"""
+        if self._intervals is None:
+            with self._lock:
+                if self._intervals is None:
+                    self._intervals = self.frames.protected_intervals()
+        return self._intervals
+
+    @property
+    def usable_positions(self) -> UsablePositions:
+        if self._usable_positions is None:
+            with self._lock:
+                if self._usable_positions is None:
+                    self._usable_positions = UsablePositions.from_index(
+                        self.frame_index, len(self.data)
+                    )
+        return self._usable_positions
+
+    def capacity(self, bits_per_sample: int | None = None) -> int | Dict[int, int]:
+        """
+        Raw number of bytes the carrier holds at an LSB depth (signatures and header
+        included), or a dict of it for every depth when bits_per_sample is None
+        """
+        if self._capacity is None:
+            with self._lock:
+                if self._capacity is None:
+                    usable = self.usable_positions.total()
+                    self._capacity = {
+                        bits: usable * bits // 8 for bits in sorted(SIGNATURES)
+                    }
+        if bits_per_sample is None:
+            return dict(self._capacity)
+        return self._capacity[bits_per_sample]
+
+    def embed_bytes(
+        self,
+        payload: bytes,
+        filename: str,
+        bits_per_sample: int = 2,
+        encrypt: bool | None = False,
+        key: str | None = None,
+        random_position: bool | None = False,
+    ) -> bytearray:
+        """
+        Hide payload under filename in a copy of the carrier data
+
+        Returns:
+            bytearray: The stego MP3 data
+        """
+        _check_embed_options(bits_per_sample, encrypt, key, random_position)
+
+        symbols, total_bits = build_message_symbols(
+            payload, filename, bits_per_sample, encrypt, key, log=_quiet
+        )
+        positions, values = plan_embed(
+            self.data,
+            symbols,
+            total_bits,
+            bits_per_sample,
+            key,
+            random_position,
+            self.usable_positions,
+            log=_quiet,
+        )
+
+        stego = bytearray(self.data)
+        np.frombuffer(stego, dtype=np.uint8)[positions] = values
+        return stego
+
+    def extract_bytes(
+        self,
+        encrypted: bool | None = False,
+        key: str | None = None,
+        random_position: bool | None = False,
+    ) -> Tuple[str, bytes]:
+        """
+        Decode the file hidden in the carrier
+
+        Returns:
+            Tuple[str, bytes]: (filename, payload)
+        """
+        if encrypted and key is None:
+            raise ValueError("If payload is encrypted, provide the key for decryption")
+
+        if random_position and key is None:
+            raise ValueError("If using random position, provide the key")
+
+        return _extract_payload(
+            self.data,
+            encrypted,
+            key,
+            bool(random_position),
+            self.usable_positions,
+            log=_quiet,
+        )
+
+    def detect(self, random_position: bool = False, key: str | None = None) -> int:
+        """The LSB depth of the hidden file, raises ValueError if there is none"""
+        return detect_bits_per_sample(
+            self.data, self.usable_positions, random_position, key
+        )
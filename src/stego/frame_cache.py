@@ -0,0 +1,145 @@
+import hashlib
+import os
+import tempfile
+import zipfile
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Tuple
+import numpy as np
+from stego.frames import FRAME_DTYPE, FrameTable, find_id3v2_end, scan_frame_table
+
+# Bump when frame scanning or the stored layout changes, old entries are then ignored
+FRAME_INDEX_VERSION = 1
+
+# Cache directory, "off" disables the cache
+CACHE_DIR_ENV = "STEGO_FRAME_CACHE"
+
+# Total size of the cache directory before least recently used entries are evicted
+DEFAULT_CACHE_SIZE = 64 * 1024 * 1024
+
+
+@dataclass
+class FrameIndex:
+    id3_end: int
+    frames: FrameTable
+
+
+def default_cache_dir() -> Path | None:
+    """
+    Cache directory from STEGO_FRAME_CACHE, otherwise $XDG_CACHE_HOME/audio-stego/frames
+    Returns None when the cache is disabled
+    """
+    configured = os.environ.get(CACHE_DIR_ENV)
+    if configured:
+        if configured.lower() in ("0", "off", "false", "no"):
+            return None
+        return Path(configured)
+    base = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(base) / "audio-stego" / "frames"
+
+
+class FrameIndexCache:
+    """
+    Frame tables stored as <sha256>.v<version>.npz files, evicted least recently used first.
+    The cache is best effort: any I/O error is treated as a miss
+    """
+
+    def __init__(self, directory: str | Path, max_bytes: int = DEFAULT_CACHE_SIZE):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+
+    def path_for(self, data: bytes) -> Path:
+        digest = hashlib.sha256(data).hexdigest()
+        return self.directory / f"{digest}.v{FRAME_INDEX_VERSION}.npz"
+
+    def load(self, path: Path) -> FrameIndex | None:
+        try:
+            with np.load(path, allow_pickle=False) as entry:
+                frames = entry["frames"]
+                id3_end = int(entry["id3_end"])
+            if frames.dtype != FRAME_DTYPE:
+                return None
+            # Touch the entry so eviction sees it as recently used
+            os.utime(path)
+        except (OSError, KeyError, ValueError, zipfile.BadZipFile):
+            return None
+        return FrameIndex(id3_end, FrameTable(frames))
+
+    def store(self, path: Path, index: FrameIndex) -> None:
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            # Write then rename so readers never see a partial entry
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    np.savez(f, frames=index.frames.frames, id3_end=index.id3_end)
+                os.replace(tmp_path, path)
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+            self.evict()
+        except OSError:
+            pass
+
+    def evict(self) -> None:
+        """Remove least recently used entries until the cache fits in max_bytes"""
+        entries = []
+        for path in self.directory.glob("*.npz"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                path.unlink()
+                total -= size
+            except OSError:
+                continue
+
+    def get_or_scan(self, data: bytes) -> Tuple[FrameIndex, bool]:
+        """
+        Frame index of the data, scanned and stored on a cache miss
+
+        Returns:
+            Tuple[FrameIndex, bool]: the index, and whether it was read from the cache
+        """
+        path = self.path_for(data)
+        index = self.load(path)
+        if index is not None:
+            return index, True
+        index = scan_frame_index(data)
+        self.store(path, index)
+        return index, False
+
+
+def scan_frame_index(data: bytes, max_scan: int | None = None) -> FrameIndex:
+    """Scan the ID3v2 tag and every frame of the data"""
+    id3_end = find_id3v2_end(data)
+    return FrameIndex(id3_end, scan_frame_table(data, id3_end, max_scan=max_scan))
+
+
+def load_frame_index(data: bytes, use_cache: bool = True) -> FrameIndex:
+    """
+    Frame index of the data, read from the on-disk cache when possible
+
+    Args:
+        data (bytes): MP3 data
+        use_cache (bool): look up and store the index in the default cache directory
+
+    Returns:
+        FrameIndex: ID3v2 end offset and frame table
+    """
+    return load_frame_index_cached(data, use_cache)[0]
+
+
+def load_frame_index_cached(data: bytes, use_cache: bool = True) -> Tuple[FrameIndex, bool]:
+    """load_frame_index, also returning whether the index was read from the cache"""
+    directory = default_cache_dir() if use_cache else None
+    if directory is None:
+        return scan_frame_index(data), False
+    return FrameIndexCache(directory).get_or_scan(data)
@@ -0,0 +1,516 @@
+from typing import Iterator, Sequence, Tuple
+import numpy as np
+
+
+# How many data used each second
+BITRATE_TABLE = {
+    "1": {  # MPEG-1
+        1: [
+            None,
+            32,
+            64,
+            96,
+            128,
+            160,
+            192,
+            224,
+            256,
+            288,
+            320,
+            352,
+            384,
+            416,
+            448,
+            None,
+        ],
+        2: [None, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384, None],
+        3: [None, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, None],
+    },
+    "2": {  # MPEG-2, 2.5
+        1: [None, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256, None],
+        2: [None, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160, None],
+        3: [None, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160, None],
+    },
+}
+
+# Sample rate
+SAMPLE_RATE = {
+    "1": [44100, 48000, 32000, None],  # MPEG1
+    "2": [22050, 24000, 16000, None],  # MPEG2
+    "2.5": [11025, 12000, 8000, None],  # MPEG2.5
+}
+
+
+# Bytes scanned per step when finding frames, bounds the candidate arrays of a step
+FRAME_SCAN_CHUNK = 1 << 20
+
+# Versions before the whole-file scan only found frames in this many bytes after the
+# ID3v2 tag, everything after was usable. Files they wrote need the same layout
+LEGACY_MAX_SCAN = 2_000_000
+
+
+# Version ID bits of the frame header, stored in the "version" field of FRAME_DTYPE
+MPEG1 = 3
+MPEG2 = 2
+MPEG25 = 0
+
+# Header bits 20..6 index the header lookup table
+HEADER_LUT_SHIFT = 6
+HEADER_LUT_MASK = 0x7FFF
+_HEADER_LUT: Tuple[np.ndarray, np.ndarray] | None = None
+
+# Structured record for one frame
+FRAME_DTYPE = np.dtype(
+    [
+        ("offset", np.int64),
+        ("length", np.int32),
+        ("version", np.uint8),  # MPEG1 / MPEG2 / MPEG25
+        ("layer", np.uint8),  # 1 / 2 / 3
+        ("bitrate", np.uint16),  # kbps
+        ("sample_rate", np.uint32),
+        ("channel_mode", np.uint8),  # 0 stereo, 1 joint, 2 dual, 3 mono
+        ("protection", np.uint8),  # 0 means a 16-bit CRC follows the header
+        ("padding", np.uint8),
+        ("header", np.uint32),  # raw 32-bit header
+    ]
+)
+
+
+def calculate_syncsafe(b: bytes) -> int:
+    """
+    Calculate the size of the ID3v2 tag. Only use 7 bits per byte (1 bit MSB not used).
+    Syncsafe implemented to prevent existence of pattern 0xFF (1111 1111) because it is marker
+    of the beginning of audio frame
+
+    Args:
+        b (bytes)
+
+    Returns:
+        int: size of the ID3v2 tag
+    """
+    if len(b) != 4:
+        return 0
+    return (b[0] << 21) | (b[1] << 14) | (b[2] << 7) | b[3]
+
+
+def find_id3v2_end(data: bytes) -> int:
+    """
+    If an ID3v2 tag is present at the start, return the offset where it ends
+    Otherwise return 0
+
+    Args:
+        data (bytes)
+
+    Returns:
+        int: offset of the MP3 where ID3v2 finished
+    """
+    if len(data) < 10:
+        return 0
+    if data[0:3] != b"ID3":
+        return 0
+    # ID3v2 header: 10 bytes; bytes 6..9 = size (syncsafe)
+    size = calculate_syncsafe(data[6:10])
+    # total size = header(10) + size
+    return 10 + size
+
+
+def _parse_frame_header(header_bytes: bytes) -> Tuple[bool, dict]:
+    """
+    Parse 4 bytes of MP3 header
+    {version ('1', '2'/'2.5'), layer (1/2/3), bitrate_kbps, sample_rate, padding, protection,
+    channel_mode, frame_length, header}
+    """
+    if len(header_bytes) < 4:
+        return False, {}
+    h = int.from_bytes(header_bytes, "big")
+
+    sync = (h >> 21) & 0x7FF  # 11-bit
+    if sync != 0x7FF:
+        return False, {}
+
+    version_bits = (h >> 19) & 0x3
+    layer_bits = (h >> 17) & 0x3
+    protection_bit = (h >> 16) & 0x1
+    bitrate_index = (h >> 12) & 0xF
+    sample_rate_index = (h >> 10) & 0x3
+    padding_bit = (h >> 9) & 0x1
+    channel_mode = (h >> 6) & 0x3
+
+    # Version decode: 00: MPEG 2.5, 01: reserved, 10: MPEG2, 11: MPEG1
+    if version_bits == 0:
+        version = "2.5"
+        version_key = "2"
+    elif version_bits == 1:
+        return False, {}
+    elif version_bits == 2:
+        version = "2"
+        version_key = "2"
+    else:
+        version = "1"
+        version_key = "1"
+
+    # Layer decode: 00: reserved, 01: Layer 3, 10: Layer 2, 11: Layer 1
+    if layer_bits == 0:
+        return False, {}
+    layer = {1: 3, 2: 2, 3: 1}[layer_bits]
+
+    if bitrate_index == 0 or bitrate_index == 15:
+        return False, {}
+
+    sample_rates = (
+        SAMPLE_RATE["1"]
+        if version == "1"
+        else (SAMPLE_RATE["2"] if version == "2" else SAMPLE_RATE["2.5"])
+    )
+    sample_rate = sample_rates[sample_rate_index]
+    if sample_rate is None:
+        return False, {}
+
+    bitrates = BITRATE_TABLE[version_key].get(layer)
+    if not bitrates:
+        return False, {}
+    bitrate_kbps = bitrates[bitrate_index]
+    if bitrate_kbps is None:
+        return False, {}
+
+    if layer == 1:
+        # Layer 1
+        frame_length = int((12 * bitrate_kbps * 1000 / sample_rate + padding_bit) * 4)
+    else:
+        # Layer 2 3
+        if version == "1":
+            frame_length = int(144000 * bitrate_kbps / sample_rate + padding_bit)
+        else:
+            # MPEG2/MPEG2.5
+            if layer == 3:
+                frame_length = int(72000 * bitrate_kbps / sample_rate + padding_bit)
+            else:
+                frame_length = int(144000 * bitrate_kbps / sample_rate + padding_bit)
+
+    return True, {
+        "version": version,
+        "layer": layer,
+        "bitrate_kbps": bitrate_kbps,
+        "sample_rate": sample_rate,
+        "padding": padding_bit,
+        "protection": protection_bit,
+        "channel_mode": channel_mode,
+        "frame_length": frame_length,
+        "header": h,
+    }
+
+
+def header_lut() -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Lookup table over header bits 20..6 (version, layer, protection, bitrate index,
+    sample rate index, padding, private, channel mode), built at first use from
+    _parse_frame_header. Index with (header >> HEADER_LUT_SHIFT) & HEADER_LUT_MASK
+    once the sync bits are checked
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: frame length and Layer 3 side info size.
+        Frame length is 0 for invalid headers
+    """
+    global _HEADER_LUT
+    if _HEADER_LUT is None:
+        lengths = np.zeros(HEADER_LUT_MASK + 1, dtype=np.int32)
+        side_info = np.zeros(HEADER_LUT_MASK + 1, dtype=np.uint8)
+        for index in range(HEADER_LUT_MASK + 1):
+            header = 0xFFE00000 | (index << HEADER_LUT_SHIFT)
+            valid, info = _parse_frame_header(header.to_bytes(4, "big"))
+            if not valid:
+                continue
+            lengths[index] = info["frame_length"]
+            if info["layer"] == 3:
+                mono = info["channel_mode"] == 3
+                if info["version"] == "1":
+                    side_info[index] = 17 if mono else 32
+                else:
+                    side_info[index] = 9 if mono else 17
+        _HEADER_LUT = (lengths, side_info)
+    return _HEADER_LUT
+
+
+def _build_field_tables() -> Tuple[np.ndarray, np.ndarray]:
+    """Bitrate [version bits, layer bits, index] and sample rate [version bits, index] arrays"""
+    bitrates = np.zeros((4, 4, 16), dtype=np.uint16)
+    sample_rates = np.zeros((4, 4), dtype=np.uint32)
+    for version_bits, version in ((MPEG1, "1"), (MPEG2, "2"), (MPEG25, "2.5")):
+        version_key = "1" if version == "1" else "2"
+        for layer_bits, layer in ((3, 1), (2, 2), (1, 3)):
+            bitrates[version_bits, layer_bits] = [
+                kbps or 0 for kbps in BITRATE_TABLE[version_key][layer]
+            ]
+        sample_rates[version_bits] = [rate or 0 for rate in SAMPLE_RATE[version]]
+    return bitrates, sample_rates
+
+
+_BITRATES, _SAMPLE_RATES = _build_field_tables()
+
+
+class FrameTable:
+    """
+    Frames of an MP3 file in a NumPy structured array (FRAME_DTYPE), sorted by offset
+    """
+
+    def __init__(self, frames: np.ndarray | None = None):
+        self.frames = np.zeros(0, dtype=FRAME_DTYPE) if frames is None else frames
+
+    @classmethod
+    def from_columns(
+        cls, offsets: Sequence[int], lengths: Sequence[int], headers: Sequence[int]
+    ) -> "FrameTable":
+        """
+        Build the table from the offsets, lengths and 32-bit headers of valid frames
+        """
+        table = np.zeros(len(offsets), dtype=FRAME_DTYPE)
+        if not len(offsets):
+            return cls(table)
+
+        h = np.asarray(headers, dtype=np.int64)
+        version_bits = (h >> 19) & 0x3
+        layer_bits = (h >> 17) & 0x3
+
+        table["offset"] = offsets
+        table["length"] = lengths
+        table["version"] = version_bits
+        table["layer"] = 4 - layer_bits
+        table["bitrate"] = _BITRATES[version_bits, layer_bits, (h >> 12) & 0xF]
+        table["sample_rate"] = _SAMPLE_RATES[version_bits, (h >> 10) & 0x3]
+        table["channel_mode"] = (h >> 6) & 0x3
+        table["protection"] = (h >> 16) & 0x1
+        table["padding"] = (h >> 9) & 0x1
+        table["header"] = h
+        return cls(table)
+
+    @classmethod
+    def concatenate(cls, tables: list["FrameTable"]) -> "FrameTable":
+        """Join tables of consecutive file regions"""
+        if not tables:
+            return cls()
+        return cls(np.concatenate([table.frames for table in tables]))
+
+    def __len__(self) -> int:
+        return len(self.frames)
+
+    def __getitem__(self, key) -> "FrameTable":
+        return FrameTable(np.atleast_1d(self.frames[key]))
+
+    @property
+    def offsets(self) -> np.ndarray:
+        return self.frames["offset"]
+
+    @property
+    def lengths(self) -> np.ndarray:
+        return self.frames["length"].astype(np.int64)
+
+    @property
+    def ends(self) -> np.ndarray:
+        return self.offsets + self.lengths
+
+    def samples_per_frame(self) -> np.ndarray:
+        """PCM samples per channel in each frame"""
+        layer = self.frames["layer"]
+        samples = np.where(layer == 1, 384, 1152)
+        # MPEG2 / MPEG2.5 Layer 3 frames carry half the samples
+        return np.where((layer == 3) & (self.frames["version"] != MPEG1), 576, samples)
+
+    def durations(self) -> np.ndarray:
+        """Duration of each frame in seconds"""
+        return self.samples_per_frame() / self.frames["sample_rate"].astype(np.float64)
+
+    def start_times(self) -> np.ndarray:
+        """Start time of each frame in seconds, from the first frame"""
+        durations = self.durations()
+        return np.cumsum(durations) - durations
+
+    def select_time_range(self, start: float, end: float) -> "FrameTable":
+        """Frames that overlap [start, end) seconds"""
+        starts = self.start_times()
+        keep = (starts < end) & (starts + self.durations() > start)
+        return FrameTable(self.frames[keep])
+
+    def side_info_size(self) -> np.ndarray:
+        """
+        Layer 3 side information bytes after the header (and CRC) of each frame
+        MPEG1: mono 17, stereo 32. MPEG2/2.5: mono 9, stereo 17. Other layers: 0
+        """
+        return header_lut()[1][(self.frames["header"] >> HEADER_LUT_SHIFT) & HEADER_LUT_MASK]
+
+    def protected_intervals(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        [start, end) byte intervals that must not be modified in each frame:
+        header + side info + scale factors (first 36 bytes) and the last 10 bytes
+        Returns (starts, ends), two intervals per frame
+        """
+        offsets, ends = self.offsets, self.ends
+        head_end = np.minimum(offsets + 36, ends)
+        tail_start = np.maximum(offsets + 4, ends - 10)
+        return np.concatenate((offsets, tail_start)), np.concatenate((head_end, ends))
+
+    def protected_bytes(self) -> np.ndarray:
+        """Number of protected bytes in each frame"""
+        lengths = self.lengths
+        head = np.minimum(36, lengths)
+        tail = np.minimum(10, lengths - 4)
+        overlap = np.maximum(0, head - np.maximum(4, lengths - 10))
+        return head + tail - overlap
+
+    def usable_bytes(self) -> np.ndarray:
+        """Number of bytes in each frame that can carry embedded bits"""
+        return self.lengths - self.protected_bytes()
+
+    def total_usable_bytes(self) -> int:
+        """Usable bytes inside all frames (bytes between frames are not counted)"""
+        return int(self.usable_bytes().sum())
+
+
+# (frame offsets, frame lengths, 32-bit headers), as lists or arrays
+FrameColumns = Tuple[Sequence[int], Sequence[int], Sequence[int]]
+
+
+def _scan_frames(
+    buf: bytes, start: int, end: int, base: int, n: int
+) -> Tuple[FrameColumns, int]:
+    """
+    Find the frame chain over buf, checking candidate headers at positions [start, end)
+
+    Every sync candidate (0xFF followed by 3 set bits) is found and decoded at once
+    with NumPy, then the chain is walked over the valid candidates only. Each frame
+    starts at the first valid candidate from the end of the previous one. Buffers
+    are read in place (bytes, mmap, memoryview)
+
+    Args:
+        buf (bytes): Scanned bytes, buf[0] is at file offset base
+        start (int): First candidate position in buf
+        end (int): Stop before this position, a 4-byte header must fit before it
+        base (int): File offset of buf[0]
+        n (int): Total file length, used for the frame sanity checks
+
+    Returns:
+        Tuple[FrameColumns, int]: frame offsets (file offsets), lengths and headers,
+        and the buf position where scanning has to resume
+    """
+    empty = np.zeros(0, dtype=np.int64)
+    if end <= start:
+        return (empty, empty, empty), start
+
+    window = np.frombuffer(buf, dtype=np.uint8)[start : end + 3]
+    candidates = np.flatnonzero(window[:-3] == 0xFF)
+    candidates = candidates[(window[candidates + 1] & 0xE0) == 0xE0]
+
+    low = (
+        (window[candidates + 1].astype(np.int64) << 16)
+        | (window[candidates + 2].astype(np.int64) << 8)
+        | window[candidates + 3]
+    )
+    lengths = header_lut()[0][(low >> HEADER_LUT_SHIFT) & HEADER_LUT_MASK].astype(np.int64)
+    positions = candidates + start
+
+    # invalid header (0) and sanity checks
+    valid = (lengths > 4) & (base + positions + lengths <= n)
+    positions, lengths, low = positions[valid], lengths[valid], low[valid]
+    if not len(positions):
+        return (empty, empty, empty), end
+
+    # After a frame the scan resumes at the first valid candidate from its end
+    following = np.searchsorted(positions, positions + lengths).tolist()
+    chain = []
+    i = 0
+    while i < len(following):
+        chain.append(i)
+        i = following[i]
+
+    positions, lengths = positions[chain], lengths[chain]
+    resume = max(int(positions[-1] + lengths[-1]), end)
+    return (base + positions, lengths, 0xFF000000 | low[chain]), resume
+
+
+def _iter_scan(
+    data: bytes, start_offset: int, search_end: int, chunk_size: int
+) -> Iterator[Tuple[FrameColumns, int]]:
+    """
+    Scan candidate positions [start_offset, search_end) of data about chunk_size
+    bytes at a time, yielding the frames of each step and where the next one starts
+    """
+    n = len(data)
+    chunk_size = max(chunk_size, 4)
+    pos = start_offset
+    while True:
+        columns, resume = _scan_frames(data, pos, min(pos + chunk_size, search_end), 0, n)
+        yield columns, resume
+        if resume >= search_end:
+            return
+        pos = resume
+
+
+def _scan_data(data: bytes, start_offset: int, max_scan: int | None) -> FrameColumns:
+    """Scan in-memory data from start_offset, limited to max_scan bytes if set"""
+    n = len(data)
+    limit = n if max_scan is None else min(n, start_offset + max_scan)
+    steps = [
+        columns
+        for columns, _ in _iter_scan(data, start_offset, max(limit - 3, 0), FRAME_SCAN_CHUNK)
+    ]
+    return tuple(np.concatenate(column) for column in zip(*steps))
+
+
+def find_mp3_frames(
+    data: bytes,
+    start_offset: int = 0,
+    min_consec: int = 3,
+    max_scan: int | None = None,
+) -> list[Tuple[int, int]]:
+    """
+    Find MP3 frames by finding sync words and validating headers
+    Return list of (frame_offset, frame_length)
+    min_consec: kept for compatibility. Runs shorter than this have always been kept
+        as single frames, so every valid frame is returned and the protected layout of
+        existing stego files does not change
+    max_scan: if set, limit finding to first max_scan bytes after start_offset
+    """
+    offsets, lengths, _ = _scan_data(data, start_offset, max_scan)
+    return list(zip(np.asarray(offsets).tolist(), np.asarray(lengths).tolist()))
+
+
+def scan_frame_table(
+    data: bytes,
+    start_offset: int = 0,
+    max_scan: int | None = None,
+) -> FrameTable:
+    """
+    Find MP3 frames like find_mp3_frames, keeping the decoded header fields
+
+    Args:
+        data (bytes): MP3 data
+        start_offset (int): Offset where finding starts (end of the ID3v2 tag)
+        max_scan (int): if set, limit finding to first max_scan bytes after start_offset
+
+    Returns:
+        FrameTable: every frame found
+    """
+    return FrameTable.from_columns(*_scan_data(data, start_offset, max_scan))
+
+
+def iter_frame_tables(
+    data: bytes,
+    start_offset: int = 0,
+    chunk_size: int = FRAME_SCAN_CHUNK,
+) -> Iterator[Tuple[FrameTable, int]]:
+    """
+    Find MP3 frames of in-memory data incrementally, about chunk_size bytes at a time,
+    so callers can stop scanning once they have seen enough frames
+
+    Args:
+        data (bytes): MP3 data
+        start_offset (int): Offset where finding starts (end of the ID3v2 tag)
+        chunk_size (int): Bytes scanned per step
+
+    Yields:
+        Tuple[FrameTable, int]: frames found in this step, and the offset before which
+        every frame is known (len(data) once the whole data is scanned)
+    """
+    n = len(data)
+    search_end = max(n - 3, 0)
+    for columns, resume in _iter_scan(data, start_offset, search_end, chunk_size):
+        yield FrameTable.from_columns(*columns), n if resume >= search_end else resume
@@ -0,0 +1,157 @@
+from typing import Iterator, Tuple
+import numpy as np
+from stego.frame_cache import FrameIndex
+from stego.frames import FRAME_SCAN_CHUNK, FrameTable, find_id3v2_end, iter_frame_tables
+
+# Usable byte runs [start, end), sorted and disjoint
+Runs = Tuple[np.ndarray, np.ndarray]
+
+
+def _scan_limit(id3_end: int, max_scan: int | None) -> int | None:
+    """Frames starting at or after this offset are not protected, like find_mp3_frames"""
+    return None if max_scan is None else id3_end + max_scan - 3
+
+
+def usable_runs(
+    frames: FrameTable, region_start: int, region_end: int, limit: int | None = None
+) -> Runs:
+    """
+    The runs of [region_start, region_end) outside the protected intervals of the frames
+    that start before limit (all of them if None)
+    """
+    if limit is not None:
+        frames = frames[frames.offsets < limit]
+    starts, ends = frames.protected_intervals()
+    starts = np.maximum(starts, region_start)
+    ends = np.minimum(ends, region_end)
+    keep = starts < ends
+    starts, ends = starts[keep], ends[keep]
+
+    if not len(starts):
+        if region_start < region_end:
+            return np.array([region_start]), np.array([region_end])
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+
+    # Merge the intervals, a gap opens where an interval starts after all earlier ones end
+    order = np.argsort(starts, kind="stable")
+    starts = starts[order]
+    covered = np.maximum.accumulate(ends[order])
+
+    run_starts = np.concatenate(([region_start], covered))
+    run_ends = np.concatenate((starts, [region_end]))
+    keep = run_starts < run_ends
+    return run_starts[keep].astype(np.int64), run_ends[keep].astype(np.int64)
+
+
+def iter_usable_runs(
+    data: bytes, chunk_size: int = FRAME_SCAN_CHUNK, max_scan: int | None = None
+) -> Iterator[Runs]:
+    """
+    Yield the usable runs region by region from the start of the data, scanning
+    frames only as far as the caller consumes. With max_scan, only frames in the
+    first max_scan bytes after the ID3v2 tag are protected (LEGACY_MAX_SCAN layout)
+    """
+    n = len(data)
+    id3_end = find_id3v2_end(data)
+    limit = _scan_limit(id3_end, max_scan)
+    region_start = min(id3_end, n)
+    for frames, known_end in iter_frame_tables(data, region_start, chunk_size):
+        if limit is not None and known_end >= limit:
+            # No frame after the limit is protected, the rest of the data is one region
+            yield usable_runs(frames, region_start, n, limit)
+            return
+        yield usable_runs(frames, region_start, known_end)
+        region_start = known_end
+
+
+class UsablePositions:
+    """
+    Usable byte positions of stego data, stored as runs of consecutive bytes.
+    Logical position k lies in the run whose prefix sum of lengths passes k, found
+    by binary search, so no entry is kept per byte. A random start offset wraps
+    around the total. Runs are scanned from the start only as far as needed
+    """
+
+    def __init__(self, regions: Iterator[Runs]):
+        self._regions = regions
+        self.run_starts = np.zeros(0, dtype=np.int64)
+        self.run_ends = np.zeros(0, dtype=np.int64)
+        # Logical position of the end of each run
+        self.cumulative = np.zeros(0, dtype=np.int64)
+        self.complete = False
+
+    @classmethod
+    def from_data(
+        cls, data: bytes, chunk_size: int = FRAME_SCAN_CHUNK, max_scan: int | None = None
+    ) -> "UsablePositions":
+        return cls(iter_usable_runs(data, chunk_size, max_scan))
+
+    @classmethod
+    def from_index(
+        cls, index: FrameIndex, size: int, max_scan: int | None = None
+    ) -> "UsablePositions":
+        """
+        All usable positions of a file of size bytes with a full frame index, with
+        max_scan only the frames in the first max_scan bytes after the ID3v2 tag are protected
+        """
+        runs = usable_runs(
+            index.frames,
+            min(index.id3_end, size),
+            size,
+            _scan_limit(index.id3_end, max_scan),
+        )
+        usable = cls(iter((runs,)))
+        usable.total()
+        return usable
+
+    @classmethod
+    def from_array(cls, positions: np.ndarray) -> "UsablePositions":
+        positions = np.asarray(positions, dtype=np.int64)
+        breaks = np.flatnonzero(np.diff(positions) != 1) + 1
+        firsts = np.concatenate(([0], breaks)) if len(positions) else breaks
+        lasts = np.append(breaks, len(positions)) if len(positions) else breaks
+        usable = cls(iter(((positions[firsts], positions[lasts - 1] + 1),)))
+        usable.total()
+        return usable
+
+    def known(self) -> int:
+        """Number of positions scanned so far"""
+        return int(self.cumulative[-1]) if len(self.cumulative) else 0
+
+    def ensure(self, count: int) -> int:
+        """Scan until at least count positions are known (or the data ends), return how many are"""
+        starts, ends = [self.run_starts], [self.run_ends]
+        known = self.known()
+        while known < count and not self.complete:
+            try:
+                region_starts, region_ends = next(self._regions)
+            except StopIteration:
+                self.complete = True
+                break
+            starts.append(region_starts)
+            ends.append(region_ends)
+            known += int((region_ends - region_starts).sum())
+        if len(starts) > 1:
+            self.run_starts = np.concatenate(starts)
+            self.run_ends = np.concatenate(ends)
+            self.cumulative = np.cumsum(self.run_ends - self.run_starts)
+        return known
+
+    def total(self) -> int:
+        """Number of usable positions in the whole data, scans everything"""
+        while not self.complete:
+            self.ensure(self.known() + 1)
+        return self.known()
+
+    def offsets(self, logical: np.ndarray) -> np.ndarray:
+        """Byte positions of known logical positions"""
+        run = np.searchsorted(self.cumulative, logical, side="right")
+        run_first = self.cumulative[run] - (self.run_ends[run] - self.run_starts[run])
+        return self.run_starts[run] + (logical - run_first)
+
+    def take(self, first: int, last: int, start_offset: int = 0) -> np.ndarray:
+        """Byte positions of the logical positions [first, last) after start_offset"""
+        logical = np.arange(first, last, dtype=np.int64)
+        if start_offset != 0 or self.ensure(last) < last:
+            logical = (start_offset + logical) % self.total()
+        return self.offsets(logical)
@@ -1,8 +1,16 @@
+import contextlib
 import os
-from typing import Tuple, Dict
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, Tuple
+import numpy as np
 from randomizer.randomize_position import generate_random_position
+from stego.frame_cache import load_frame_index, load_frame_index_cached, scan_frame_index
+from stego.frames import LEGACY_MAX_SCAN, find_id3v2_end
+from stego.positions import UsablePositions
 from fileio import reader, writter
 from cipher import vigenere_decrypt, vigenere_encrypt
+from utils.exceptions import IOReaderError
 
 
 # Signature to tell extractor which n-bit used
@@ -13,599 +21,1009 @@ SIGNATURES: Dict[int, Tuple[str, str]] = {
     4: ("01010101010101", "10101010101010"),  # 4bit
 }
 
-# How many data used each second
-BITRATE_TABLE = {
-    "1": {  # MPEG-1
-        1: [
-            None,
-            32,
-            64,
-            96,
-            128,
-            160,
-            192,
-            224,
-            256,
-            288,
-            320,
-            352,
-            384,
-            416,
-            448,
-            None,
-        ],
-        2: [None, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384, None],
-        3: [None, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, None],
-    },
-    "2": {  # MPEG-2, 2.5
-        1: [None, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256, None],
-        2: [None, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160, None],
-        3: [None, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160, None],
-    },
-}
+# Bytes scanned per step when probing files for a signature
+PROBE_SCAN_CHUNK = 16 * 1024
 
-# Sample rate
-SAMPLE_RATE = {
-    "1": [44100, 48000, 32000, None],  # MPEG1
-    "2": [22050, 24000, 16000, None],  # MPEG2
-    "2.5": [11025, 12000, 8000, None],  # MPEG2.5
-}
+
+def signature_to_bits(binary_string: str) -> np.ndarray:
+    """Convert binary string to an array of bits (uint8 0/1)"""
+    return np.frombuffer(binary_string.encode("ascii"), dtype=np.uint8) - ord("0")
 
 
-def calculate_syncsafe(b: bytes) -> int:
+def build_embed_symbols(
+    data: bytes, bits_per_sample: int, start_signature: str, end_signature: str
+) -> np.ndarray:
     """
-    Calculate the size of the ID3v2 tag. Only use 7 bits per byte (1 bit MSB not used).
-    Syncsafe implemented to prevent existence of pattern 0xFF (1111 1111) because it is marker
-    of the beginning of audio frame
+    Turn signature + data + signature into n-bit symbols, one per carrier byte
+
+    The bit stream is split MSB first into groups of bits_per_sample bits.
+    A trailing partial group keeps its bits right-aligned, and when the stream
+    ends exactly on a group boundary one extra zero symbol is emitted, so the
+    result matches the original bit-by-bit embedding loop.
 
     Args:
-        b (bytes)
+        data (bytes): header + payload
+        bits_per_sample (int): Number of LSB used (1-4)
+        start_signature (str): Start signature bits
+        end_signature (str): End signature bits
 
     Returns:
-        int: size of the ID3v2 tag
+        np.ndarray: uint8 array of symbols
     """
-    if len(b) != 4:
-        return 0
-    return (b[0] << 21) | (b[1] << 14) | (b[2] << 7) | b[3]
+    bits = np.concatenate(
+        (
+            signature_to_bits(start_signature),
+            np.unpackbits(np.frombuffer(bytes(data), dtype=np.uint8)),
+            signature_to_bits(end_signature),
+        )
+    )
 
+    full_groups, remainder = divmod(len(bits), bits_per_sample)
+    weights = (1 << np.arange(bits_per_sample - 1, -1, -1)).astype(np.uint8)
+    symbols = bits[: full_groups * bits_per_sample].reshape(-1, bits_per_sample) @ weights
 
-def find_id3v2_end(data: bytes) -> int:
+    tail = 0
+    for bit in bits[full_groups * bits_per_sample :]:
+        tail = (tail << 1) | int(bit)
+
+    return np.append(symbols.astype(np.uint8), np.uint8(tail))
+
+
+def plan_embed_writes(
+    carrier: bytes,
+    usable_positions: np.ndarray | UsablePositions,
+    symbols: np.ndarray,
+    bits_per_sample: int,
+    start_offset: int = 0,
+) -> Tuple[np.ndarray, np.ndarray]:
     """
-    If an ID3v2 tag is present at the start, return the offset where it ends
-    Otherwise return 0
+    Compute the carrier bytes that embedding the symbols modifies
 
-    Args:
-        data (bytes)
+    Symbol k goes to usable_positions[(start_offset + k) % total_positions],
+    symbols beyond the number of usable positions are dropped.
 
     Returns:
-        int: offset of the MP3 where ID3v2 finished
-    """
-    if len(data) < 10:
-        return 0
-    if data[0:3] != b"ID3":
-        return 0
-    # ID3v2 header: 10 bytes; bytes 6..9 = size (syncsafe)
-    size = calculate_syncsafe(data[6:10])
-    # total size = header(10) + size
-    return 10 + size
-
-
-def _parse_frame_header(header_bytes: bytes) -> Tuple[bool, dict]:
-    """
-    Parse 4 bytes of MP3 header
-    {version_key ('1', '2'/'2.5'), layer (1/2/3), bitrate_kbps, sample_rate, padding, frame_length}
-    """
-    if len(header_bytes) < 4:
-        return False, {}
-    h = int.from_bytes(header_bytes, "big")
-
-    sync = (h >> 21) & 0x7FF  # 11-bit
-    if sync != 0x7FF:
-        return False, {}
-
-    version_bits = (h >> 19) & 0x3
-    layer_bits = (h >> 17) & 0x3
-    protection_bit = (h >> 16) & 0x1
-    bitrate_index = (h >> 12) & 0xF
-    sample_rate_index = (h >> 10) & 0x3
-    padding_bit = (h >> 9) & 0x1
-
-    # Version decode: 00: MPEG 2.5, 01: reserved, 10: MPEG2, 11: MPEG1
-    if version_bits == 0:
-        version = "2.5"
-        version_key = "2"
-    elif version_bits == 1:
-        return False, {}
-    elif version_bits == 2:
-        version = "2"
-        version_key = "2"
-    else:
-        version = "1"
-        version_key = "1"
+        Tuple[np.ndarray, np.ndarray]: (positions, new byte values)
+    """
+    if not isinstance(usable_positions, UsablePositions):
+        usable_positions = UsablePositions.from_array(usable_positions)
+
+    count = min(len(symbols), usable_positions.ensure(len(symbols)))
+
+    positions = usable_positions.take(0, count, start_offset)
+    mask = np.uint8((0xFF << bits_per_sample) & 0xFF)
+
+    values = (np.frombuffer(carrier, dtype=np.uint8)[positions] & mask) | symbols[:count]
+    return positions, values
+
+
+def _check_embed_options(
+    bits_per_sample: int,
+    encrypt: bool | None,
+    key: str | None,
+    random_position: bool | None,
+) -> None:
+    if not (1 <= bits_per_sample <= 4):
+        raise ValueError("LSB bit must be between 1 and 4")
+
+    if bits_per_sample not in SIGNATURES:
+        raise ValueError(f"No signature defined for {bits_per_sample} bits per sample")
+
+    if encrypt and key is None:
+        raise ValueError("If using encryption, provide the key")
+
+    if random_position and key is None:
+        raise ValueError("If using random position, provide the key")
+
+
+def build_message_symbols(
+    payload: bytes,
+    filename: str,
+    bits_per_sample: int,
+    encrypt: bool | None = False,
+    key: str | None = None,
+    log: Callable[[str], None] = print,
+) -> Tuple[np.ndarray, int]:
+    """
+    Encrypt the payload if asked, prepend the header and turn the message into symbols
+
+    Returns:
+        Tuple[np.ndarray, int]: (symbols, number of message bits including signatures)
+    """
+    filename_bytes = filename.encode("utf-8")
+
+    if len(filename_bytes) > 255:
+        raise ValueError("Filename too long (max 255 bytes)")
+
+    if encrypt and key is not None:
+        payload = vigenere_encrypt(data=payload, key=key)
+        log(f"Encrypted payload length: {len(payload)} bytes")
+
+    # header: [payload_length: 4 bytes][filename_length: 1 byte][filename: N bytes]
+    # payload is after encryption
+    header = (
+        len(payload).to_bytes(4, "little")
+        + bytes([len(filename_bytes)])
+        + filename_bytes
+    )
+
+    log(f"Embedding file: {filename}")
+    log(f"Filename length: {len(filename_bytes)} bytes")
+    log(f"Payload length: {len(payload)} bytes")
 
-    # Layer decode: 00: reserved, 01: Layer 3, 10: Layer 2, 11: Layer 1
-    if layer_bits == 0:
-        return False, {}
-    layer = {1: 3, 2: 2, 3: 1}[layer_bits]
+    start_signature, end_signature = SIGNATURES[bits_per_sample]
 
-    if bitrate_index == 0 or bitrate_index == 15:
-        return False, {}
+    signature_bits = len(start_signature) + len(end_signature)
+    data_bits = (len(header) + len(payload)) * 8
+    total_bits = signature_bits + data_bits
 
-    sample_rates = (
-        SAMPLE_RATE["1"]
-        if version == "1"
-        else (SAMPLE_RATE["2"] if version == "2" else SAMPLE_RATE["2.5"])
+    symbols = build_embed_symbols(
+        header + payload, bits_per_sample, start_signature, end_signature
     )
-    sample_rate = sample_rates[sample_rate_index]
-    if sample_rate is None:
-        return False, {}
-
-    bitrates = BITRATE_TABLE[version_key].get(layer)
-    if not bitrates:
-        return False, {}
-    bitrate_kbps = bitrates[bitrate_index]
-    if bitrate_kbps is None:
-        return False, {}
-
-    if layer == 1:
-        # Layer 1
-        frame_length = int((12 * bitrate_kbps * 1000 / sample_rate + padding_bit) * 4)
-    else:
-        # Layer 2 3
-        if version == "1":
-            frame_length = int(144000 * bitrate_kbps / sample_rate + padding_bit)
-        else:
-            # MPEG2/MPEG2.5
-            if layer == 3:
-                frame_length = int(72000 * bitrate_kbps / sample_rate + padding_bit)
-            else:
-                frame_length = int(144000 * bitrate_kbps / sample_rate + padding_bit)
-
-    return True, {
-        "version": version,
-        "layer": layer,
-        "bitrate_kbps": bitrate_kbps,
-        "sample_rate": sample_rate,
-        "padding": padding_bit,
-        "protection": protection_bit,
-        "frame_length": frame_length,
-    }
+    return symbols, total_bits
 
 
-def find_mp3_frames(
-    data: bytes, start_offset: int = 0, min_consec: int = 3, max_scan: int | None = None
-) -> list[Tuple[int, int]]:
+def plan_embed(
+    cover: bytes,
+    symbols: np.ndarray,
+    total_bits: int,
+    bits_per_sample: int,
+    key: str | None = None,
+    random_position: bool | None = False,
+    usable_positions: UsablePositions | None = None,
+    log: Callable[[str], None] = print,
+) -> Tuple[np.ndarray, np.ndarray]:
     """
-    Find MP3 frames by finding sync words and validating headers
-    Return list of (frame_offset, frame_length)
-    min_consec: require this many consecutive valid frames
-    max_scan: if set, limit finding to first max_scan bytes after start_offset
+    Check the message fits the cover and compute the bytes embedding it modifies
+
+    Args:
+        cover (bytes): Cover audio data
+        symbols (np.ndarray): Message symbols from build_message_symbols
+        total_bits (int): Message bits from build_message_symbols
+        bits_per_sample (int): Number of LSB used (1-4)
+        key (str): Key for randomization
+        random_position (bool): Use randomized starting position
+        usable_positions: Already scanned carrier positions, found from the cover if None
+        log: Called with each progress message
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: (positions, new byte values)
     """
-    pos = start_offset
-    n = len(data)
-    frames = []
-    limit = n if max_scan is None else min(n, start_offset + max_scan)
+    # A random start depends on the number of positions in the whole file,
+    # otherwise frames are only scanned until the message fits
+    if usable_positions is None and random_position:
+        usable_positions = UsablePositions.from_index(load_frame_index(cover), len(cover))
+    elif usable_positions is None:
+        usable_positions = UsablePositions.from_data(cover)
+
+    if random_position:
+        found = usable_positions.total()
+    else:
+        found = usable_positions.ensure(len(symbols))
 
-    # Check if found a valid header
-    while pos + 4 <= limit:
-        # fast sync check: two bytes 0xFF (first 11-bits)
-        valid, info = _parse_frame_header(data[pos : pos + 4])
-        if not valid:
-            pos += 1
-            continue
+    capacity_bits = found * bits_per_sample
 
-        frame_len = info["frame_length"]
-        # sanity checks
-        if frame_len <= 4 or pos + frame_len > n:
-            pos += 1
-            continue
+    if usable_positions.complete:
+        log(f"Bits needed: {total_bits}, Capacity: {capacity_bits}")
+    else:
+        log(f"Bits needed: {total_bits}, Capacity: at least {capacity_bits}")
 
-        # check next frame header exists at pos + frame_len
-        next_pos = pos + frame_len
-        valid2, _ = (False, {})
-        if next_pos + 4 <= limit:
-            valid2, _ = _parse_frame_header(data[next_pos : next_pos + 4])
+    if total_bits > capacity_bits:
+        raise ValueError(
+            f"Message too large: need {total_bits} bits, have {capacity_bits}"
+        )
 
-        if not valid2:
-            frames.append((pos, frame_len))
-            pos += frame_len
-            continue
-        else:
-            # at least two consecutive valid frames (1111 1111), then run
-            run_start = pos
-            run_len = frame_len
-            count = 1
-            cur = next_pos
-            while cur + 4 <= limit:
-                v, inf = _parse_frame_header(data[cur : cur + 4])
-                if not v:
-                    break
-                fl = inf["frame_length"]
-                if fl <= 4 or cur + fl > n:
-                    break
-                run_len += fl
-                count += 1
-                cur += fl
-            if count >= min_consec:
-                cur2 = run_start
-                for _ in range(count):
-                    _, info_run = _parse_frame_header(data[cur2 : cur2 + 4])
-                    frames.append((cur2, info_run["frame_length"]))
-                    cur2 += info_run["frame_length"]
-                pos = cur2
-            else:
-                frames.append((pos, frame_len))
-                pos += frame_len
-
-    return frames
-
-
-def build_protected_indices(data: bytes) -> set[int]:
-    """
-    Returns a set of byte indices that must not be modified:
-      - The entire ID3v2 tag region at start (if present)
-      - The 4-byte header for each MP3 frame found
-    """
-    protected = set()
-
-    # Protect ID3v2 tag
-    id3_end = find_id3v2_end(data)
-    if id3_end > 0:
-        protected.update(range(0, id3_end))
-
-    frames = find_mp3_frames(data, start_offset=id3_end, min_consec=3, max_scan=2000000)
-
-    for fstart, flen in frames:
-        # Protect frame header (4 bytes)
-        for i in range(fstart, min(fstart + 4, len(data))):
-            protected.add(i)
-
-        # For Layer 3 frames, protect the side information
-        # Mono: 17 bytes, stereo: 32 bytes
-        # after the 4-byte header
-        if flen > 4:
-            # header + side info + scale factors
-            protected_end = min(fstart + 36, fstart + flen, len(data))
-            for i in range(fstart + 4, protected_end):
-                protected.add(i)
-
-            last_protected_start = max(fstart + 4, fstart + flen - 10)
-            for i in range(last_protected_start, fstart + flen):
-                if i < len(data):
-                    protected.add(i)
-
-    return protected
-
-
-def string_to_bit_stream(binary_string: str):
-    """Convert binary string to bit"""
-    for char in binary_string:
-        if char in "01":
-            yield int(char)
+    # Random start positioning
+    start_offset = 0
+    if random_position and key is not None:
+        start_offset = generate_random_position(key, found)
+        log(f"Using randomized starting position: {start_offset}")
+
+    # Circular embed case
+    return plan_embed_writes(
+        cover, usable_positions, symbols, bits_per_sample, start_offset
+    )
 
 
 def embed(
     audio_path: str,
     file_to_hide_path: str,
-    output_path: str,
+    output_path: str | None,
     bits_per_sample: int = 2,
     encrypt: bool | None = False,
     key: str | None = None,
     random_position: bool | None = False,
+    in_place: bool = False,
 ) -> None:
     """
     Hide a file inside an audio file
 
+    The cover is copied to the output and only the modified bytes are written
+
     Args:
         audio_path: Cover audio file path
         file_to_hide_path: Path to the file that will be hidden
-        output_path: Path output will be saved
+        output_path: Path output will be saved (ignored when in_place)
         bits_per_sample: Number of LSB to use for embedding (1-4)
         encrypt: encrypt the payload
         key: Key for encryption/decryption and randomization
         random_position: Use randomized starting position
+        in_place: Modify the cover file itself instead of writing an output file
 
     Raises:
         ValueError: If audio file is too small or files cannot be processed
         IOError: If files cannot be read or written
     """
-    if not (1 <= bits_per_sample <= 4):
-        raise ValueError("LSB bit must be between 1 and 4")
+    if not in_place and output_path is None:
+        raise ValueError("Provide an output path or embed in place")
 
-    if bits_per_sample not in SIGNATURES:
-        raise ValueError(f"No signature defined for {bits_per_sample} bits per sample")
+    plan = _plan_embed_file(
+        audio_path, file_to_hide_path, bits_per_sample, encrypt, key, random_position
+    )
+    _write_embed_output(
+        audio_path,
+        output_path,
+        in_place,
+        plan.positions,
+        plan.values,
+        plan.filename,
+        plan.payload_len,
+    )
 
-    if encrypt and key is None:
-        raise ValueError("If using encryption, provide the key")
 
-    if random_position and key is None:
-        raise ValueError("If using random position, provide the key")
+@dataclass
+class EmbedPlan:
+    """Writes that embed a file, and how much of the cover was scanned to plan them"""
+
+    filename: str
+    payload_len: int
+    positions: np.ndarray
+    values: np.ndarray
+    # Usable positions found, all of them when complete, otherwise the scan
+    # stopped once the message fit
+    usable_positions: int
+    complete: bool
+
+
+def _plan_embed_file(
+    audio_path: str,
+    file_to_hide_path: str,
+    bits_per_sample: int,
+    encrypt: bool | None,
+    key: str | None,
+    random_position: bool | None,
+) -> EmbedPlan:
+    """Read the secret and the cover and plan the writes, nothing is written"""
+    _check_embed_options(bits_per_sample, encrypt, key, random_position)
 
     # Import
-    carrier = reader.read_mp3_bytes(audio_path)
     message_file = reader.read_secret_file(file_to_hide_path)
     payload = message_file.content
 
     filename = os.path.basename(file_to_hide_path)
-    filename_bytes = filename.encode("utf-8")
+    symbols, total_bits = build_message_symbols(
+        payload, filename, bits_per_sample, encrypt, key
+    )
 
-    if len(filename_bytes) > 255:
-        raise ValueError("Filename too long (max 255 bytes)")
+    # The cover is only read, the output is patched afterwards
+    with reader.map_mp3_bytes(audio_path) as cover:
+        if random_position:
+            usable_positions = UsablePositions.from_index(
+                load_frame_index(cover), len(cover)
+            )
+        else:
+            usable_positions = UsablePositions.from_data(cover)
+        positions, values = plan_embed(
+            cover,
+            symbols,
+            total_bits,
+            bits_per_sample,
+            key,
+            random_position,
+            usable_positions,
+        )
+        plan = EmbedPlan(
+            filename,
+            len(payload),
+            positions,
+            values,
+            usable_positions.known(),
+            usable_positions.complete,
+        )
+        # An unfinished scan references the mapping, drop it before it is closed
+        del usable_positions
+    return plan
 
-    if encrypt and key is not None:
-        payload = vigenere_encrypt(data=payload, key=key)
-        print(f"Encrypted payload length: {len(payload)} bytes")
 
-    # header: [payload_length: 4 bytes][filename_length: 1 byte][filename: N bytes]
-    # payload is after encryption
-    header = (
-        len(payload).to_bytes(4, "little")
-        + bytes([len(filename_bytes)])
-        + filename_bytes
-    )
+def _write_embed_output(
+    audio_path: str,
+    output_path: str | None,
+    in_place: bool,
+    positions: np.ndarray,
+    values: np.ndarray,
+    filename: str,
+    payload_len: int,
+) -> None:
+    """Copy the cover to the output (unless in place) and patch the planned bytes"""
+    # Writing the output over the cover is the same as embedding in place
+    if not in_place and os.path.exists(output_path):
+        in_place = os.path.samefile(audio_path, output_path)
 
-    print(f"Embedding file: {filename}")
-    print(f"Filename length: {len(filename_bytes)} bytes")
-    print(f"Payload length: {len(payload)} bytes")
+    if in_place:
+        writter.patch_mp3_bytes(audio_path, positions, values)
+    else:
+        writter.copy_mp3_file(audio_path, output_path)
+        writter.patch_mp3_bytes(output_path, positions, values)
+    print(f"Successfully embedded '{filename}' ({payload_len} bytes)")
 
-    start_signature, end_signature = SIGNATURES[bits_per_sample]
 
-    protected = build_protected_indices(bytes(carrier))
-    usable_positions = [i for i in range(len(carrier)) if i not in protected]
+def read_stego_bits(
+    stego: bytes,
+    usable_positions: np.ndarray | UsablePositions,
+    bits_per_sample: int,
+    bit_offset: int,
+    bit_count: int,
+    start_offset: int = 0,
+) -> np.ndarray:
+    """
+    Read a range of embedded bits in one indexed gather
 
-    signature_bits = len(start_signature) + len(end_signature)
-    data_bits = (len(header) + len(payload)) * 8
-    total_bits = signature_bits + data_bits
-    capacity_bits = len(usable_positions) * bits_per_sample
+    Args:
+        stego (bytes): The stego audio data
+        usable_positions: Usable byte positions (non-protected), an array or lazily
+            scanned UsablePositions
+        bits_per_sample (int): Number of LSB used (1-4)
+        bit_offset (int): Index of the first bit in the embedded bit stream
+        bit_count (int): Number of bits to read
+        start_offset (int): Starting position index (randomized start)
 
-    print(f"Bits needed: {total_bits}, Capacity: {capacity_bits}")
+    Returns:
+        np.ndarray: uint8 array of bit_count bits (0/1), MSB first
+    """
+    if bit_count <= 0:
+        return np.zeros(0, dtype=np.uint8)
 
-    if total_bits > capacity_bits:
-        raise ValueError(
-            f"Message too large: need {total_bits} bits, have {capacity_bits}"
-        )
+    if not isinstance(usable_positions, UsablePositions):
+        usable_positions = UsablePositions.from_array(usable_positions)
 
-    def combined_bit_stream():
-        for bit in string_to_bit_stream(start_signature):
-            yield bit
-        for byte in header + payload:
-            for bitpos in range(7, -1, -1):
-                yield (byte >> bitpos) & 1
-        # End signature bits
-        for bit in string_to_bit_stream(end_signature):
-            yield bit
+    first = bit_offset // bits_per_sample
+    last = (bit_offset + bit_count + bits_per_sample - 1) // bits_per_sample
 
-    # Random start positioning
-    start_offset = 0
-    if random_position and key is not None:
-        start_offset = generate_random_position(key, len(usable_positions))
-        print(f"Using randomized starting position: {start_offset}")
+    positions = usable_positions.take(first, last, start_offset)
+    lsb_mask = np.uint8((1 << bits_per_sample) - 1)
+    symbols = np.frombuffer(stego, dtype=np.uint8)[positions] & lsb_mask
+
+    # Each byte unpacks to 8 bits, only the low bits_per_sample bits are used
+    bits = np.unpackbits(symbols[:, None], axis=1)[:, 8 - bits_per_sample :]
+
+    skip = bit_offset - first * bits_per_sample
+    return bits.reshape(-1)[skip : skip + bit_count]
+
+
+def _signature_tables() -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Index tables to read the start signature prefix for every bit depth at once:
+    bit i of depth k is (byte[i // k] >> (k - 1 - i % k)) & 1
+
+    Returns:
+        bits_per_sample values, byte index and shift per (depth, bit), signature values
+    """
+    depths = np.array(sorted(SIGNATURES), dtype=np.int64)
+    sig_bits = max(len(SIGNATURES[k][0]) for k in depths)
+    bit = np.arange(sig_bits)
+    byte_index = bit[None, :] // depths[:, None]
+    shift = depths[:, None] - 1 - bit[None, :] % depths[:, None]
+    values = np.array([int(SIGNATURES[k][0], 2) for k in depths], dtype=np.int64)
+    return depths, byte_index, shift, values
 
-    # Circular embed case
-    bits = combined_bit_stream()
-    mask = (0xFF << bits_per_sample) & 0xFF
-
-    position_index = 0
-    total_positions = len(usable_positions)
-    embedding_complete = False
-
-    for _ in range(total_positions):
-        actual_position_index = (start_offset + position_index) % total_positions
-        carrier_index = usable_positions[actual_position_index]
-
-        bits_val = 0
-        for _ in range(bits_per_sample):
-            try:
-                bits_val = (bits_val << 1) | next(bits)
-            except StopIteration:
-                carrier[carrier_index] = (carrier[carrier_index] & mask) | bits_val
-                embedding_complete = True
-                break
-
-        carrier[carrier_index] = (carrier[carrier_index] & mask) | bits_val
-        position_index += 1
-
-        if embedding_complete:
-            break
-
-    writter.write_mp3_bytes(output_path, carrier)
-    print(
-        f"Successfully embedded '{os.path.basename(file_to_hide_path)}' ({len(payload)} bytes)"
-    )
+
+_SIG_DEPTHS, _SIG_BYTE_INDEX, _SIG_SHIFT, _SIG_VALUES = _signature_tables()
 
 
 def detect_bits_per_sample(
     stego: bytes,
-    usable_positions: list,
+    usable_positions: np.ndarray | UsablePositions,
     random_position: bool = False,
     key: str | None = None,
 ) -> int:
     """
     Detect the LSB bit used from signature in the file
+    The first carrier bytes are gathered once and every signature is checked in
+    one vectorized step
 
     Args:
         stego (bytes): The stego audio data
-        usable_positions (list): List of usable byte positions (non-protected)
+        usable_positions: Usable byte positions (non-protected), an array or lazily
+            scanned UsablePositions
         random_position (bool): Whether randomized starting position was used
         key (str): Key for randomization
 
     Returns:
         int: The detected LSB bit (1-4), or raises ValueError if not found
     """
+    if not isinstance(usable_positions, UsablePositions):
+        usable_positions = UsablePositions.from_array(usable_positions)
+
     start_offset = 0
     if random_position and key is not None:
-        start_offset = generate_random_position(key, len(usable_positions))
+        start_offset = generate_random_position(key, usable_positions.total())
+
+    sig_bits = _SIG_BYTE_INDEX.shape[1]
+    available = min(usable_positions.ensure(sig_bits), sig_bits)
+    if available == 0:
+        raise ValueError("Could not detect LSB bits")
+
+    carrier = np.zeros(sig_bits, dtype=np.int64)
+    positions = usable_positions.take(0, available, start_offset)
+    carrier[:available] = np.frombuffer(stego, dtype=np.uint8)[positions]
+
+    # Signature prefix of every bit depth as an integer, MSB first
+    bits = (carrier[_SIG_BYTE_INDEX] >> _SIG_SHIFT) & 1
+    prefixes = bits @ (1 << np.arange(sig_bits - 1, -1, -1))
+
+    # A depth needs enough carrier bytes to hold its whole signature
+    readable = (sig_bits + _SIG_DEPTHS - 1) // _SIG_DEPTHS <= available
+    matches = np.flatnonzero(readable & (prefixes == _SIG_VALUES))
+    if not len(matches):
+        raise ValueError("Could not detect LSB bits")
+    return int(_SIG_DEPTHS[matches[0]])
+
+
+def detect_files(
+    paths: list[str],
+    random_position: bool = False,
+    key: str | None = None,
+    max_scan: int | None = None,
+) -> dict[str, int | None]:
+    """
+    Probe many MP3 files for an embedded payload, without extracting anything
 
-    total_positions = len(usable_positions)
+    Args:
+        paths (list[str]): MP3 file paths
+        random_position (bool): Whether randomized starting position was used
+        key (str): Key for randomization
+        max_scan (int): Only protect frames in this many bytes after the ID3v2 tag,
+            LEGACY_MAX_SCAN reads files made before the whole-file frame scan
 
-    for bits_per_sample, (start_sig, end_sig) in SIGNATURES.items():
+    Returns:
+        dict[str, int | None]: detected LSB bit (1-4) per path, None when the file has
+        no signature or cannot be read
+    """
+    results: dict[str, int | None] = {}
+    for path in paths:
         try:
-            extracted_bits = []
+            with reader.map_mp3_bytes(path) as stego:
+                if random_position:
+                    usable_positions = UsablePositions.from_index(
+                        load_frame_index(stego), len(stego), max_scan
+                    )
+                else:
+                    # The signature sits in the first frames
+                    usable_positions = UsablePositions.from_data(
+                        stego, chunk_size=PROBE_SCAN_CHUNK, max_scan=max_scan
+                    )
+                results[path] = detect_bits_per_sample(
+                    stego, usable_positions, random_position, key
+                )
+        except (IOReaderError, ValueError):
+            results[path] = None
+    return results
+
+
+_LEGACY_LAYOUT_HINT = (
+    "If the file was embedded by a version that only scanned the first "
+    f"{LEGACY_MAX_SCAN} bytes of frames, read it with max_scan=LEGACY_MAX_SCAN "
+    "(--legacy-layout)"
+)
+
+
+def _legacy_layout_differs(stego: bytes) -> bool:
+    """Frames lie past the LEGACY_MAX_SCAN limit, so the legacy layout has other positions"""
+    return len(stego) > find_id3v2_end(stego) + LEGACY_MAX_SCAN
+
+
+@dataclass
+class PayloadInfo:
+    """Header of an embedded file and where its payload starts in the embedded bit stream"""
+
+    filename: str
+    payload_len: int
+    bits_per_sample: int
+    start_offset: int
+    payload_bit_offset: int
+
+
+def _can_read(usable_positions: UsablePositions, bits_per_sample: int, bit_end: int) -> bool:
+    """Reading may wrap around the carrier at most twice, so it won't infinite loop"""
+    last = (bit_end + bits_per_sample - 1) // bits_per_sample
+    if usable_positions.ensure(last) >= last:
+        return True
+    return bit_end <= usable_positions.total() * 2 * bits_per_sample
+
+
+def _read_embedded_bytes(
+    stego: bytes,
+    usable_positions: UsablePositions,
+    bits_per_sample: int,
+    bit_offset: int,
+    n: int,
+    start_offset: int,
+) -> bytes:
+    """n bytes of the embedded bit stream starting at bit_offset"""
+    if not _can_read(usable_positions, bits_per_sample, bit_offset + n * 8):
+        raise ValueError("Unexpected end of data while reading file content.")
+    bits = read_stego_bits(
+        stego, usable_positions, bits_per_sample, bit_offset, n * 8, start_offset
+    )
+    return np.packbits(bits).tobytes()
 
-            if total_positions * bits_per_sample < len(start_sig):
-                continue
 
-            bits_needed = len(start_sig)
-            positions_needed = (bits_needed + bits_per_sample - 1) // bits_per_sample
+def _read_payload_info(
+    stego: bytes,
+    key: str | None,
+    random_position: bool,
+    usable_positions: UsablePositions | None = None,
+    log: Callable[[str], None] = print,
+    max_scan: int | None = None,
+) -> Tuple[PayloadInfo, UsablePositions]:
+    """
+    Decode the signature, payload length and filename of the embedded file
 
-            for pos_idx in range(positions_needed):
-                if pos_idx >= total_positions:
-                    break
+    Args:
+        stego (bytes): The stego audio data, any bytes-like object (bytes, mmap)
+        key (str): Key for randomization
+        random_position (bool): Randomized starting position was used
+        usable_positions: Already scanned carrier positions, found from the data if None
+        log: Called with each progress message
+        max_scan (int): Only protect frames in this many bytes after the ID3v2 tag
 
-                actual_position_index = (start_offset + pos_idx) % total_positions
-                byte_val = stego[usable_positions[actual_position_index]]
+    Returns:
+        Tuple[PayloadInfo, UsablePositions]: header and the carrier positions, to
+        read the payload from
+    """
+    log("Finding protected indices")
+    # A random start needs the number of positions in the whole file, otherwise
+    # frames are only scanned as far as the header and payload reach
+    if usable_positions is None and random_position:
+        usable_positions = UsablePositions.from_index(
+            load_frame_index(stego), len(stego), max_scan
+        )
+    elif usable_positions is None:
+        usable_positions = UsablePositions.from_data(stego, max_scan=max_scan)
 
-                lsb_mask = (1 << bits_per_sample) - 1
-                lsb_bits = byte_val & lsb_mask
+    try:
+        bits_per_sample = detect_bits_per_sample(
+            stego, usable_positions, random_position, key
+        )
+    except ValueError as e:
+        # The random start depends on the capacity, which the old layout counts differently
+        if random_position and max_scan is None and _legacy_layout_differs(stego):
+            raise ValueError(f"{e}. {_LEGACY_LAYOUT_HINT}") from e
+        raise
+    log(f"{bits_per_sample} bits LSB")
 
-                for bit_pos in range(bits_per_sample - 1, -1, -1):
-                    if len(extracted_bits) < bits_needed:
-                        bit_val = (lsb_bits >> bit_pos) & 1
-                        extracted_bits.append(str(bit_val))
+    # Starting offset
+    start_offset = 0
+    if random_position and key is not None:
+        start_offset = generate_random_position(key, usable_positions.total())
+        log(f"Using randomized starting position: {start_offset}")
 
-            extracted_signature = "".join(extracted_bits[: len(start_sig)])
-            if extracted_signature == start_sig:
-                return bits_per_sample
+    start_sig_length = len(SIGNATURES[bits_per_sample][0])
+    if not _can_read(usable_positions, bits_per_sample, start_sig_length):
+        raise ValueError("File is too short to contain a valid signature.")
 
-        except (IndexError, ValueError):
-            continue
+    bit_cursor = start_sig_length
 
-    raise ValueError("Could not detect LSB bits")
+    def read_bytes(n: int) -> bytes:
+        nonlocal bit_cursor
+        data = _read_embedded_bytes(
+            stego, usable_positions, bits_per_sample, bit_cursor, n, start_offset
+        )
+        bit_cursor += n * 8
+        return data
 
+    log("Reading metadata")
 
-def extract(
-    stego_audio_path: str,
-    output_path: str,
+    # Payload length (4 bytes, little-endian). Still encrypted
+    payload_len = int.from_bytes(read_bytes(4), "little")
+
+    log(f"Payload length: {payload_len} bytes")
+
+    # Each carrier byte holds bits_per_sample bits and reading wraps at most twice
+    if payload_len * 8 > len(stego) * 2 * bits_per_sample:
+        raise ValueError(f"Invalid payload length {payload_len}, file is too small")
+
+    filename_len = read_bytes(1)[0]
+
+    filename_bytes = read_bytes(filename_len)
+
+    try:
+        filename = filename_bytes.decode("utf-8")
+        log(f"Original filename: {filename}")
+    except UnicodeDecodeError:
+        # Fallback to a generic name if decoding fails
+        filename = "extracted_file.bin"
+        log(f"Warning: Could not decode filename, using '{filename}'")
+
+    info = PayloadInfo(filename, payload_len, bits_per_sample, start_offset, bit_cursor)
+    return info, usable_positions
+
+
+def _read_payload_range(
+    stego: bytes,
+    info: PayloadInfo,
+    usable_positions: UsablePositions,
+    start: int,
+    end: int,
+    encrypted: bool | None,
+    key: str | None,
+) -> bytes:
+    """
+    Decode payload bytes [start, end), only the carrier bytes holding them are read
+    """
+    data = _read_embedded_bytes(
+        stego,
+        usable_positions,
+        info.bits_per_sample,
+        info.payload_bit_offset + start * 8,
+        end - start,
+        info.start_offset,
+    )
+    if encrypted and key is not None:
+        data = vigenere_decrypt(data=data, key=key, offset=start)
+    return data
+
+
+def _extract_payload(
+    stego: bytes,
+    encrypted: bool | None,
+    key: str | None,
+    random_position: bool,
+    usable_positions: UsablePositions | None = None,
+    log: Callable[[str], None] = print,
+    max_scan: int | None = None,
+) -> Tuple[str, bytes]:
+    """
+    Decode the hidden filename and payload from stego audio data
+
+    Args:
+        stego (bytes): The stego audio data, any bytes-like object (bytes, mmap)
+        encrypted (bool): Is the payload was encrypted
+        key (str): Key for decryption and randomization
+        random_position (bool): Randomized starting position was used
+        usable_positions: Already scanned carrier positions, found from the data if None
+        log: Called with each progress message
+        max_scan (int): Only protect frames in this many bytes after the ID3v2 tag
+
+    Returns:
+        Tuple[str, bytes]: (filename, payload)
+
+    Raises:
+        ValueError: If the end signature does not match on data where the legacy
+            layout differs, the payload read is then not the one embedded
+    """
+    info, usable_positions = _read_payload_info(
+        stego, key, random_position, usable_positions, log, max_scan
+    )
+    bits_per_sample = info.bits_per_sample
+
+    payload = _read_payload_range(
+        stego, info, usable_positions, 0, info.payload_len, encrypted, key
+    )
+    if encrypted and key is not None:
+        log(f"Decrypted payload length: {len(payload)} bytes")
+
+    bit_cursor = info.payload_bit_offset + info.payload_len * 8
+    end_sig = SIGNATURES[bits_per_sample][1]
+    # The last symbol holds the leftover bits of the stream right-aligned
+    # (see build_embed_symbols), so it is read whole and its low bits are kept
+    tail = (bit_cursor + len(end_sig)) % bits_per_sample
+    read_length = len(end_sig) + (bits_per_sample - tail if tail else 0)
+    try:
+        end_length = read_length
+        if not _can_read(usable_positions, bits_per_sample, bit_cursor + end_length):
+            max_bits = usable_positions.total() * 2 * bits_per_sample
+            end_length = max(0, max_bits - bit_cursor)
+        end_bits = read_stego_bits(
+            stego,
+            usable_positions,
+            bits_per_sample,
+            bit_cursor,
+            end_length,
+            info.start_offset,
+        )
+        if tail and len(end_bits) == read_length:
+            end_bits = np.concatenate((end_bits[: len(end_sig) - tail], end_bits[-tail:]))
+        extracted_end_signature = "".join(str(bit) for bit in end_bits)
+    except Exception as e:
+        log(f"Could not verify end signature: {e}")
+        return info.filename, payload
+
+    if extracted_end_signature == end_sig:
+        log("End signature verified")
+    elif max_scan is None and _legacy_layout_differs(stego):
+        raise ValueError(f"End signature mismatch. {_LEGACY_LAYOUT_HINT}")
+    else:
+        log("Warning: End signature mismatch")
+
+    return info.filename, payload
+
+
+def _open_stego(source: str | os.PathLike | bytes | bytearray | memoryview):
+    """
+    Map a stego file read-only, data that is already in memory is used as is.
+    Either must start like an MP3
+    """
+    if isinstance(source, (str, os.PathLike)):
+        return reader.map_mp3_bytes(source)
+    reader.check_mp3_signature(source)
+    return contextlib.nullcontext(source)
+
+
+def extract_info(
+    stego_audio_path: str | os.PathLike | bytes | bytearray | memoryview,
+    key: str | None = None,
+    random_position: bool | None = False,
+    max_scan: int | None = None,
+) -> PayloadInfo:
+    """
+    Read only the header of the hidden file: its name and payload length
+
+    Args:
+        stego_audio_path: Path to stego audio file, or its data
+        key (str): Key for randomization
+        random_position (bool): Randomized starting position was used
+        max_scan (int): Only protect frames in this many bytes after the ID3v2 tag,
+            LEGACY_MAX_SCAN reads files made before the whole-file frame scan
+
+    Returns:
+        PayloadInfo: filename, payload length and bit layout of the hidden file
+    """
+    if random_position and key is None:
+        raise ValueError("If using random position, provide the key")
+
+    with _open_stego(stego_audio_path) as stego:
+        info, _ = _read_payload_info(
+            stego, key, bool(random_position), max_scan=max_scan
+        )
+    return info
+
+
+def extract_range(
+    stego_audio_path: str | os.PathLike | bytes | bytearray | memoryview,
+    start: int = 0,
+    end: int | None = None,
     encrypted: bool | None = False,
     key: str | None = None,
     random_position: bool | None = False,
-) -> str:
+    max_scan: int | None = None,
+) -> Tuple[PayloadInfo, bytes]:
     """
-    Extract hidden file from a MP3
+    Extract payload bytes [start, end) of the hidden file without decoding the rest
+
+    The range is clipped to the payload like a slice, end None means the end of it.
+    The end signature is not read, so a file needing the legacy layout is not detected
 
     Args:
-        stego_audio_path (str): Path to stego audio file
-        output_path (str): Directory where the extracted file will be saved
+        stego_audio_path: Path to stego audio file, or its data
+        start (int): First payload byte
+        end (int): Payload byte after the last one
         encrypted (bool): Is the payload was encrypted
         key (str): Key for decryption and randomization
         random_position (bool): Randomized starting position was used
+        max_scan (int): Only protect frames in this many bytes after the ID3v2 tag,
+            LEGACY_MAX_SCAN reads files made before the whole-file frame scan
 
     Returns:
-        str: Full path to the extracted file
+        Tuple[PayloadInfo, bytes]: header of the hidden file, requested bytes
     """
     if encrypted and key is None:
         raise ValueError("If payload is encrypted, provide the key for decryption")
 
-    if random_position is None:
-        random_position = False
-
-    stego = reader.read_mp3_bytes(stego_audio_path)
+    if random_position and key is None:
+        raise ValueError("If using random position, provide the key")
 
-    print("Finding protected indices")
-    protected = build_protected_indices(stego)
-    usable_positions = [i for i in range(len(stego)) if i not in protected]
+    if start < 0 or (end is not None and end < 0):
+        raise ValueError("Payload range must not be negative")
 
-    bits_per_sample = detect_bits_per_sample(
-        stego, usable_positions, random_position, key
-    )
-    print(f"{bits_per_sample} bits LSB")
+    with _open_stego(stego_audio_path) as stego:
+        info, usable_positions = _read_payload_info(
+            stego, key, bool(random_position), max_scan=max_scan
+        )
+        end = info.payload_len if end is None else min(end, info.payload_len)
+        start = min(start, end)
+        data = _read_payload_range(
+            stego, info, usable_positions, start, end, encrypted, key
+        )
+    return info, data
 
-    # Starting offset
-    start_offset = 0
-    if random_position and key is not None:
-        start_offset = generate_random_position(key, len(usable_positions))
-        print(f"Using randomized starting position: {start_offset}")
 
-    def bit_stream_generator():
-        position_index = 0
-        total_positions = len(usable_positions)
+def _quiet(message: str) -> None:
+    pass
 
-        while True:
-            actual_position_index = (start_offset + position_index) % total_positions
-            pos = usable_positions[actual_position_index]
 
-            byte_val = stego[pos]
-            lsb_mask = (1 << bits_per_sample) - 1
-            lsb_bits = byte_val & lsb_mask
+def inspect(
+    stego_audio_path: str | os.PathLike | bytes | bytearray | memoryview,
+    key: str | None = None,
+    random_position: bool | None = False,
+    max_scan: int | None = None,
+) -> dict:
+    """
+    Report the MP3 layout and the header of a hidden file, without reading its payload
 
-            for bit_pos in range(bits_per_sample - 1, -1, -1):
-                yield (lsb_bits >> bit_pos) & 1
+    Args:
+        stego_audio_path: Path to the MP3 file, or its data
+        key (str): Key for randomization
+        random_position (bool): Randomized starting position was used
+        max_scan (int): Only protect frames in this many bytes after the ID3v2 tag,
+            LEGACY_MAX_SCAN reads files made before the whole-file frame scan
 
-            position_index += 1
-            if position_index >= total_positions * 2:  # So it won't infinite loop
-                break
+    Returns:
+        dict: JSON-serializable report, path is None for data. bits_per_sample, payload_len and filename are
+        None when no hidden file is detected, capacity_bytes is the raw number of
+        bytes each LSB depth can carry (signatures and header included).
+        frame_index_cached is True when the frames were read from the on-disk
+        cache instead of scanned
+    """
+    if random_position and key is None:
+        raise ValueError("If using random position, provide the key")
 
-    bit_gen = bit_stream_generator()
+    with _open_stego(stego_audio_path) as stego:
+        index_start = time.perf_counter()
+        index, cached = load_frame_index_cached(stego)
+        index_seconds = time.perf_counter() - index_start
 
-    start_sig_length = len(SIGNATURES[bits_per_sample][0])
-    try:
-        for _ in range(start_sig_length):
-            next(bit_gen)
-    except StopIteration as e:
-        raise ValueError("File is too short to contain a valid signature.") from e
+        file_size = len(stego)
+        usable_positions = UsablePositions.from_index(index, file_size, max_scan)
+        usable = usable_positions.total()
 
-    def read_bits(n: int) -> int:
-        val = 0
         try:
-            for _ in range(n):
-                val = (val << 1) | next(bit_gen)
-        except StopIteration as e:
-            raise ValueError(
-                "Unexpected end of data while reading file content."
-            ) from e
-        return val
+            info, _ = _read_payload_info(
+                stego, key, bool(random_position), usable_positions, log=_quiet
+            )
+        except ValueError:
+            info = None
+
+    return {
+        "path": (
+            str(stego_audio_path)
+            if isinstance(stego_audio_path, (str, os.PathLike))
+            else None
+        ),
+        "file_size": file_size,
+        "id3_size": index.id3_end,
+        "frame_count": len(index.frames),
+        "frame_index_cached": cached,
+        # Time to scan the frames, or to hash the data and read the cached index
+        "frame_index_seconds": round(index_seconds, 6),
+        "usable_bytes": usable,
+        "capacity_bytes": {
+            bits: usable * bits // 8 for bits in sorted(SIGNATURES)
+        },
+        "bits_per_sample": info.bits_per_sample if info else None,
+        "payload_len": info.payload_len if info else None,
+        "filename": info.filename if info else None,
+    }
 
-    print("Reading metadata")
 
-    # Payload length (4 bytes, little-endian). Still encrypted
-    payload_len = 0
-    for i in range(4):
-        b = read_bits(8)
-        payload_len |= b << (i * 8)
+def embed_bytes(
+    cover: bytes | bytearray | memoryview,
+    payload: bytes | bytearray | memoryview,
+    filename: str,
+    bits_per_sample: int = 2,
+    encrypt: bool | None = False,
+    key: str | None = None,
+    random_position: bool | None = False,
+) -> bytearray:
+    """
+    Hide payload under filename in a copy of the cover data, without disk I/O or output
 
-    print(f"Payload length: {payload_len} bytes")
+    The cover is read in place, only the returned stego data is a new buffer
 
-    filename_len = read_bits(8)
+    Args:
+        cover: Cover MP3 data, any bytes-like object
+        payload: Data to hide
+        filename: Name stored in the header (max 255 bytes UTF-8)
+        bits_per_sample (int): Number of LSB to use for embedding (1-4)
+        encrypt (bool): encrypt the payload
+        key (str): Key for encryption and randomization
+        random_position (bool): Use randomized starting position
 
-    filename_bytes = bytes(read_bits(8) for _ in range(filename_len))
+    Returns:
+        bytearray: The stego MP3 data
+    """
+    positions, values = _plan_embed_data(
+        cover, payload, filename, bits_per_sample, encrypt, key, random_position
+    )
 
-    try:
-        filename = filename_bytes.decode("utf-8")
-        print(f"Original filename: {filename}")
-    except UnicodeDecodeError:
-        # Fallback to a generic name if decoding fails
-        filename = "extracted_file.bin"
-        print(f"Warning: Could not decode filename, using '{filename}'")
+    stego = bytearray(cover)
+    np.frombuffer(stego, dtype=np.uint8)[positions] = values
+    return stego
+
+
+def _plan_embed_data(
+    cover: bytes | bytearray | memoryview,
+    payload: bytes | bytearray | memoryview,
+    filename: str,
+    bits_per_sample: int,
+    encrypt: bool | None,
+    key: str | None,
+    random_position: bool | None,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Plan the writes of embed_bytes, the cover is only read"""
+    _check_embed_options(bits_per_sample, encrypt, key, random_position)
+    reader.check_mp3_signature(cover, "Cover")
+
+    symbols, total_bits = build_message_symbols(
+        payload, filename, bits_per_sample, encrypt, key, log=_quiet
+    )
 
-    payload = bytearray(payload_len)
-    for i in range(payload_len):
-        payload[i] = read_bits(8)
+    # Scanned here rather than through load_frame_index to stay off the disk cache
+    usable_positions = None
+    if random_position:
+        usable_positions = UsablePositions.from_index(scan_frame_index(cover), len(cover))
+
+    positions, values = plan_embed(
+        cover,
+        symbols,
+        total_bits,
+        bits_per_sample,
+        key,
+        random_position,
+        usable_positions,
+        log=_quiet,
+    )
+    return positions, values
 
-    if encrypted and key is not None:
-        payload = vigenere_decrypt(data=payload, key=key)
-        print(f"Decrypted payload length: {len(payload)} bytes")
 
-    try:
-        end_sig = SIGNATURES[bits_per_sample][1]
-        extracted_end_bits = []
-
-        for _ in range(len(end_sig)):
-            try:
-                bit = next(bit_gen)
-                extracted_end_bits.append(str(bit))
-            except StopIteration:
-                break
-
-        extracted_end_signature = "".join(extracted_end_bits)
-        if extracted_end_signature == end_sig:
-            print("End signature verified")
-        else:
-            print("Warning: End signature mismatch")
-    except Exception as e:
-        print(f"Could not verify end signature: {e}")
+def extract_bytes(
+    stego: bytes | bytearray | memoryview,
+    encrypted: bool | None = False,
+    key: str | None = None,
+    random_position: bool | None = False,
+    max_scan: int | None = None,
+) -> Tuple[str, bytes]:
+    """
+    Decode the file hidden in stego data, without disk I/O or output
 
-    os.makedirs(output_path, exist_ok=True)
+    Args:
+        stego: Stego MP3 data, any bytes-like object, read in place
+        encrypted (bool): Is the payload was encrypted
+        key (str): Key for decryption and randomization
+        random_position (bool): Randomized starting position was used
+        max_scan (int): Only protect frames in this many bytes after the ID3v2 tag,
+            LEGACY_MAX_SCAN reads files made before the whole-file frame scan
 
+    Returns:
+        Tuple[str, bytes]: (filename, payload)
+    """
+    if encrypted and key is None:
+        raise ValueError("If payload is encrypted, provide the key for decryption")
+
+    if random_position and key is None:
+        raise ValueError("If using random position, provide the key")
+
+    reader.check_mp3_signature(stego)
+
+    usable_positions = None
+    if random_position:
+        usable_positions = UsablePositions.from_index(
+            scan_frame_index(stego), len(stego), max_scan
+        )
+
+    return _extract_payload(
+        stego,
+        encrypted,
+        key,
+        bool(random_position),
+        usable_positions,
+        log=_quiet,
+        max_scan=max_scan,
+    )
+
+
+def _unique_output_file(output_path: str, filename: str) -> str:
+    """Path for filename in output_path, numbered when a file of that name exists"""
     output_file = os.path.join(output_path, filename)
 
     if os.path.exists(output_file):
@@ -616,7 +1034,84 @@ def extract(
             counter += 1
         print(f"File exists, saving as: {os.path.basename(output_file)}")
 
-    with open(output_file, "wb") as out:
+    return output_file
+
+
+def extract(
+    stego_audio_path: str | os.PathLike | bytes | bytearray | memoryview,
+    output_path: str,
+    encrypted: bool | None = False,
+    key: str | None = None,
+    random_position: bool | None = False,
+    byte_range: Tuple[int, int | None] | None = None,
+    max_scan: int | None = None,
+) -> str:
+    """
+    Extract hidden file from a MP3
+
+    Args:
+        stego_audio_path: Path to stego audio file, or its data
+        output_path (str): Directory where the extracted file will be saved
+        encrypted (bool): Is the payload was encrypted
+        key (str): Key for decryption and randomization
+        random_position (bool): Randomized starting position was used
+        byte_range: Only extract payload bytes [start, end), saved as name.start-end.ext
+        max_scan (int): Only protect frames in this many bytes after the ID3v2 tag,
+            LEGACY_MAX_SCAN reads files made before the whole-file frame scan
+
+    Returns:
+        str: Full path to the extracted file
+    """
+    filename, payload = _read_hidden_file(
+        stego_audio_path, encrypted, key, random_position, byte_range, max_scan
+    )
+    return _save_extracted_file(output_path, filename, payload)
+
+
+def _read_hidden_file(
+    stego_audio_path: str | os.PathLike | bytes | bytearray | memoryview,
+    encrypted: bool | None,
+    key: str | None,
+    random_position: bool | None,
+    byte_range: Tuple[int, int | None] | None,
+    max_scan: int | None = None,
+) -> Tuple[str, bytes]:
+    """Name to save the extracted payload (or part of it) under, and its bytes"""
+    if encrypted and key is None:
+        raise ValueError("If payload is encrypted, provide the key for decryption")
+
+    if random_position is None:
+        random_position = False
+
+    if byte_range is None:
+        # Map the file read-only, only the pages that are read are loaded
+        with _open_stego(stego_audio_path) as stego:
+            return _extract_payload(
+                stego, encrypted, key, random_position, max_scan=max_scan
+            )
+
+    info, payload = extract_range(
+        stego_audio_path, *byte_range, encrypted, key, random_position, max_scan
+    )
+    # Name the part after the bytes it holds
+    start = min(byte_range[0], info.payload_len)
+    base, ext = os.path.splitext(info.filename)
+    return f"{base}.{start}-{start + len(payload)}{ext}", payload
+
+
+def _save_extracted_file(output_path: str, filename: str, payload: bytes) -> str:
+    os.makedirs(output_path, exist_ok=True)
+
+    # Created exclusively, concurrent extractions into one directory get distinct names
+    while True:
+        output_file = _unique_output_file(output_path, filename)
+        try:
+            out = open(output_file, "xb")
+        except FileExistsError:
+            continue
+        break
+
+    with out:
         out.write(payload)
 
     print(f"Extracted {len(payload)} bytes → {output_file}")
@@ -6,3 +6,6 @@ class IOWriterError(Exception):
 
 class StegoCompareError(Exception):
     """ Raised when comparing two MP3 files. """
+
+class DaemonError(Exception):
+    """ Raised when the stego daemon cannot be reached or answers badly. """
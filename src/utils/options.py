@@ -0,0 +1,27 @@
+from typing import Any, Tuple
+
+
+def parse_flag(value: Any) -> bool:
+    """Truthy option value, strings such as "1", "true", "yes" and "on" count as set"""
+    if isinstance(value, str):
+        return value.strip().lower() in ("1", "true", "yes", "on")
+    return bool(value)
+
+
+def parse_byte_range(value: str) -> Tuple[int, int | None]:
+    """
+    Parse START:END into a payload byte range, START defaults to 0 and END to the end
+
+    Raises:
+        ValueError: value is not START:END or a bound is negative
+    """
+    start, sep, end = value.partition(":")
+    try:
+        if not sep:
+            raise ValueError
+        byte_range = (int(start) if start else 0, int(end) if end else None)
+    except ValueError:
+        raise ValueError(f"invalid range '{value}', expected START:END")
+    if byte_range[0] < 0 or (byte_range[1] is not None and byte_range[1] < 0):
+        raise ValueError(f"invalid range '{value}', must not be negative")
+    return byte_range